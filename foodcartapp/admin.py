@@ -11,6 +11,7 @@ from .models import ProductCategory
 from .models import Restaurant
 from .models import RestaurantMenuItem
 from .models import Order, OrderItem
+from .assignment import assign_pending_orders
 
 from django import forms
 
@@ -31,6 +32,7 @@ class RestaurantAdmin(admin.ModelAdmin):
         "name",
         "address",
         "contact_phone",
+        "capacity",
     ]
     inlines = [RestaurantMenuItemInline]
 
@@ -162,6 +164,7 @@ class OrderAdmin(admin.ModelAdmin):
         "comment",
         "payment_method",
         "restaurant",
+        "total",
     ]
     autocomplete_fields = ["restaurant"]
     search_fields = ["firstname", "lastname", "phonenumber", "address"]
@@ -172,8 +175,22 @@ class OrderAdmin(admin.ModelAdmin):
 
     readonly_fields = [
         "created_at",
+        "total",
     ]
 
+    actions = ["assign_restaurants"]
+
+    @admin.action(description="Распределить новые заказы по ресторанам")
+    def assign_restaurants(self, request, queryset):
+        orders = queryset.filter(
+            status="new", restaurant__isnull=True, latitude__isnull=False
+        )
+        assignments = assign_pending_orders(orders)
+        self.message_user(
+            request,
+            f"Назначено заказов: {len(assignments)} из {queryset.count()}",
+        )
+
     def response_change(self, request, obj):
         next_url = request.GET.get("next")
         if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts=None):
@@ -0,0 +1,200 @@
+from collections import namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from foodcartapp.changes import schedule_changes_publish
+from foodcartapp.distances import has_coordinates
+from foodcartapp.menu import get_capable_restaurants
+from foodcartapp.models import Order, Restaurant
+from foodcartapp.spatial import restaurant_index
+
+Assignment = namedtuple("Assignment", ["order", "restaurant", "distance"])
+
+
+def solve_assignment(cost):
+    """Венгерский алгоритм для прямоугольной матрицы стоимостей.
+
+    Каждой строке сопоставляется не больше одного столбца так, чтобы сумма
+    стоимостей была минимальной. Проход по столбцам векторизован, так что
+    на Python остаётся не больше O(n·m) шагов, а на практике намного меньше.
+    Возвращает массивы номеров строк и столбцов, как linear_sum_assignment.
+    """
+    cost = np.asarray(cost, dtype=float)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=int)
+    way = np.zeros(m + 1, dtype=int)
+    for row in range(1, n + 1):
+        owner[0] = row
+        column = 0
+        min_values = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while owner[column]:
+            used[column] = True
+            current_row = owner[column]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < min_values[1:])
+            min_values[1:][better] = reduced[better]
+            way[1:][better] = column
+
+            candidates = np.where(free, min_values[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_values[~used] -= delta
+            column = next_column
+
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    columns = np.nonzero(owner[1:])[0]
+    rows = owner[1:][columns] - 1
+    if transposed:
+        rows, columns = columns, rows
+    order = np.argsort(rows)
+    return rows[order], columns[order]
+
+
+def get_pending_orders():
+    return Order.objects.filter(
+        status="new", restaurant__isnull=True, latitude__isnull=False
+    )
+
+
+def get_free_capacity(restaurant_ids):
+    restaurants = Restaurant.objects.filter(pk__in=restaurant_ids).annotate(
+        active_orders=Count("orders", filter=~Q(orders__status="completed"))
+    )
+    return {
+        restaurant.id: max(restaurant.capacity - restaurant.active_orders, 0)
+        for restaurant in restaurants
+    }
+
+
+def plan_assignment(orders):
+    """Распределяет заказы по ресторанам с минимальным суммарным расстоянием.
+
+    Ресторан получает не больше заказов, чем позволяет его свободная
+    вместимость, а заказ — только ресторан, способный приготовить его
+    целиком и найденный индексом в пределах RESTAURANT_SEARCH_RADIUS_KM.
+    Каждый ресторан разворачивается в столбцы-слоты по числу свободных
+    мест, после чего задача сводится к назначению.
+    """
+    orders = [order for order in orders if has_coordinates(order)]
+    capable = get_capable_restaurants(orders)
+    restaurants = {
+        restaurant.id: restaurant
+        for order in orders
+        for restaurant in capable[order.id]
+    }
+    grid = restaurant_index.sync(restaurants.values())
+    nearby = [
+        restaurant_index.nearest(
+            order.latitude,
+            order.longitude,
+            radius_km=settings.RESTAURANT_SEARCH_RADIUS_KM,
+            ids={restaurant.id for restaurant in capable[order.id]},
+            grid=grid,
+        )
+        for order in orders
+    ]
+    restaurants = [
+        restaurants[restaurant_id]
+        for restaurant_id in dict.fromkeys(
+            restaurant_id for found in nearby for restaurant_id, _ in found
+        )
+    ]
+    if not orders or not restaurants:
+        return []
+
+    columns = {restaurant.id: i for i, restaurant in enumerate(restaurants)}
+    allowed = np.zeros((len(orders), len(restaurants)), dtype=bool)
+    distances = np.zeros((len(orders), len(restaurants)))
+    for row, found in enumerate(nearby):
+        for restaurant_id, distance in found:
+            allowed[row, columns[restaurant_id]] = True
+            distances[row, columns[restaurant_id]] = distance
+
+    free_capacity = get_free_capacity(columns)
+    slots = np.minimum(
+        [free_capacity.get(restaurant.id, 0) for restaurant in restaurants],
+        allowed.sum(axis=0),
+    )
+    slot_restaurants = np.repeat(np.arange(len(restaurants)), slots)
+    if not len(slot_restaurants):
+        return []
+
+    # Недопустимые пары дороже любого допустимого назначения, так что
+    # сначала назначается как можно больше заказов, а потом сокращается путь
+    forbidden_cost = (distances[allowed].max(initial=0) + 1) * (len(orders) + 1)
+    cost = np.where(allowed, distances, forbidden_cost)[:, slot_restaurants]
+    rows, slot_columns = solve_assignment(cost)
+
+    assignments = []
+    for row, slot in zip(rows, slot_columns):
+        column = slot_restaurants[slot]
+        if allowed[row, column]:
+            assignments.append(
+                Assignment(
+                    orders[row],
+                    restaurants[column],
+                    round(float(distances[row, column]), 1),
+                )
+            )
+    return assignments
+
+
+def assign_pending_orders(orders=None, dry_run=False):
+    """Назначает рестораны неназначенным новым заказам одним пакетом.
+
+    Всё происходит в одной транзакции: заказы блокируются с skip_locked,
+    так что параллельный запуск берёт другие заказы, а перед сохранением
+    блокируются рестораны и их свободная вместимость проверяется заново.
+    """
+    pending = get_pending_orders()
+    if orders is not None:
+        pending = pending.filter(pk__in=[order.pk for order in orders])
+
+    with transaction.atomic():
+        locked = list(pending.select_for_update(skip_locked=True).order_by("pk"))
+        assignments = plan_assignment(locked)
+        if dry_run or not assignments:
+            return assignments
+
+        restaurant_ids = {assignment.restaurant.id for assignment in assignments}
+        list(
+            Restaurant.objects.filter(pk__in=restaurant_ids)
+            .order_by("pk")
+            .select_for_update()
+            .values_list("pk", flat=True)
+        )
+        free_capacity = get_free_capacity(restaurant_ids)
+        confirmed = []
+        for assignment in assignments:
+            if free_capacity.get(assignment.restaurant.id, 0) > 0:
+                free_capacity[assignment.restaurant.id] -= 1
+                confirmed.append(assignment)
+
+        now = timezone.now()
+        for assignment in confirmed:
+            assignment.order.restaurant = assignment.restaurant
+            assignment.order.updated_at = now
+        Order.objects.bulk_update(
+            [assignment.order for assignment in confirmed],
+            ["restaurant", "updated_at"],
+        )
+        schedule_changes_publish([assignment.order.id for assignment in confirmed])
+    return confirmed
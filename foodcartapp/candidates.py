@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import transaction
+
+from foodcartapp.menu import get_capable_restaurants
+from foodcartapp.models import Order, OrderRestaurantCandidate
+from foodcartapp.on_commit import schedule_on_commit
+from foodcartapp.spatial import restaurant_index
+
+
+def refresh_candidates(orders):
+    """Пересчитывает и сохраняет ранжированных кандидатов для заказов."""
+    orders = list(orders)
+    if not orders:
+        return
+    ranked = restaurant_index.rank(
+        orders,
+        get_capable_restaurants(orders),
+        radius_km=settings.RESTAURANT_SEARCH_RADIUS_KM,
+    )
+    with transaction.atomic():
+        Order.objects.filter(pk__in=[order.id for order in orders]).touch()
+        OrderRestaurantCandidate.objects.filter(order__in=orders).delete()
+        OrderRestaurantCandidate.objects.bulk_create(
+            [
+                OrderRestaurantCandidate(
+                    order_id=order_id,
+                    restaurant=item["restaurant"],
+                    distance_km=item["distance"],
+                    rank=rank,
+                )
+                for order_id, items in ranked.items()
+                for rank, item in enumerate(items, start=1)
+            ]
+        )
+
+
+def refresh_open_orders_candidates():
+    refresh_candidates(
+        Order.objects.exclude(status="completed").filter(latitude__isnull=False)
+    )
+
+
+def schedule_candidates_refresh(order_ids):
+    """Откладывает пересчёт до фиксации транзакции, по разу на заказ."""
+    schedule_on_commit("candidates", order_ids, flush_candidates_refresh)
+
+
+def flush_candidates_refresh(order_ids):
+    refresh_candidates(Order.objects.filter(pk__in=order_ids))
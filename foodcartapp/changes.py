@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models import F
+
+from foodcartapp.models import Order, OrderChangeCounter
+from foodcartapp.on_commit import schedule_on_commit
+
+COUNTER_ID = 1
+
+
+def schedule_changes_publish(order_ids):
+    """Публикует изменения заказов в ленту дашборда после фиксации транзакции."""
+    schedule_on_commit("changes", order_ids, publish_order_changes)
+
+
+def publish_order_changes(order_ids):
+    """Присваивает заказам следующий номер изменения.
+
+    Счётчик увеличивается UPDATE-ом, и блокировка его строки держится до
+    конца этой короткой транзакции. Поэтому номера фиксируются строго по
+    возрастанию, и лента, прочитавшая номер N, уже видит все меньшие.
+    """
+    with transaction.atomic():
+        counter = OrderChangeCounter.objects.filter(pk=COUNTER_ID)
+        if not counter.update(value=F("value") + 1):
+            OrderChangeCounter.objects.create(pk=COUNTER_ID, value=1)
+        value = counter.values_list("value", flat=True).get()
+        Order.objects.filter(pk__in=order_ids).update(change_seq=value)
@@ -0,0 +1,89 @@
+from django.db.models import DEFERRED
+
+
+class DirtyFieldsMixin:
+    """Запоминает загруженные из базы значения полей модели.
+
+    has_changed() сравнивает поле с загруженным значением без запроса
+    к базе, а save() без update_fields сохраняет только изменённые поля
+    и поля с auto_now. Отложенные поля, которые не загружались и не
+    присваивались, не изменены. Прочие поля с неизвестным загруженным
+    значением (например, у нового объекта) считаются изменёнными.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if value is not DEFERRED
+        }
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        refreshed = self._tracked_fields()
+        if fields is not None:
+            refreshed = [
+                field
+                for field in refreshed
+                if field.name in fields or field.attname in fields
+            ]
+        self._remember_values(refreshed)
+
+    def has_changed(self, field_name):
+        attname = self._meta.get_field(field_name).attname
+        loaded = getattr(self, "_loaded_values", None)
+        if self._state.adding:
+            return True
+        if attname in self.get_deferred_fields():
+            return False
+        if loaded is None or attname not in loaded:
+            return True
+        return loaded[attname] != getattr(self, attname)
+
+    def get_dirty_fields(self):
+        return [
+            field.name
+            for field in self._tracked_fields()
+            if self.has_changed(field.name)
+        ]
+
+    def save(self, *args, **kwargs):
+        if (
+            not args
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+            and not self._state.adding
+            and getattr(self, "_loaded_values", None) is not None
+        ):
+            auto_now = [
+                field.name
+                for field in self._tracked_fields()
+                if getattr(field, "auto_now", False)
+            ]
+            kwargs["update_fields"] = set(self.get_dirty_fields() + auto_now)
+
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        fields = self._tracked_fields()
+        if update_fields is not None:
+            fields = [
+                field
+                for field in fields
+                if field.name in update_fields or field.attname in update_fields
+            ]
+        self._remember_values(fields)
+
+    def _tracked_fields(self):
+        return [field for field in self._meta.concrete_fields if not field.primary_key]
+
+    def _remember_values(self, fields):
+        if getattr(self, "_loaded_values", None) is None:
+            self._loaded_values = {}
+        deferred = self.get_deferred_fields()
+        for field in fields:
+            if field.attname not in deferred:
+                self._loaded_values[field.attname] = getattr(self, field.attname)
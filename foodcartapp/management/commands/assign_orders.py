@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.assignment import assign_pending_orders, get_pending_orders
+
+
+class Command(BaseCommand):
+    help = "Распределяет новые заказы по ресторанам с минимальным суммарным расстоянием"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Показать план, не сохраняя его"
+        )
+
+    def handle(self, *args, **options):
+        orders = list(get_pending_orders())
+        started_at = time.perf_counter()
+        assignments = assign_pending_orders(orders, dry_run=options["dry_run"])
+        elapsed = time.perf_counter() - started_at
+
+        for order, restaurant, distance in assignments:
+            self.stdout.write(f"Заказ №{order.id} → {restaurant.name}, {distance} км")
+        total = sum(assignment.distance for assignment in assignments)
+        self.stdout.write(
+            f"Назначено {len(assignments)} из {len(orders)} заказов, "
+            f"суммарно {total:.1f} км, за {elapsed:.3f} с"
+        )
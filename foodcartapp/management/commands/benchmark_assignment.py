@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from foodcartapp.assignment import solve_assignment
+
+
+class Command(BaseCommand):
+    help = "Замеряет время распределения заказов по слотам ресторанов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=300, help="Число заказов")
+        parser.add_argument(
+            "--slots", type=int, default=500, help="Число свободных мест в ресторанах"
+        )
+        parser.add_argument(
+            "--budget", type=float, default=1, help="Допустимое время, секунд"
+        )
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        cost = rng.random((options["orders"], options["slots"])) * 20
+
+        started_at = time.perf_counter()
+        rows, columns = solve_assignment(cost)
+        elapsed = time.perf_counter() - started_at
+
+        message = (
+            f"Заказов: {options['orders']}, мест: {options['slots']}, "
+            f"назначено: {len(rows)}, сумма {cost[rows, columns].sum():.1f} км "
+            f"за {elapsed * 1000:.1f} мс"
+        )
+        if elapsed > options["budget"]:
+            self.stdout.write(
+                self.style.ERROR(f"{message}, дольше {options['budget']} с")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
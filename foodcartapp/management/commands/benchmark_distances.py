@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from foodcartapp.distances import DISTANCE_MODES, distance_matrix
+
+
+class Command(BaseCommand):
+    help = "Сравнивает скорость и точность режимов расчёта расстояний"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=200, help="Число заказов")
+        parser.add_argument(
+            "--restaurants", type=int, default=50, help="Число ресторанов"
+        )
+        parser.add_argument(
+            "--span",
+            type=float,
+            default=0.15,
+            help="Разброс точек вокруг центра Москвы, градусов",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        center = np.array([55.751244, 37.618423])
+        span = options["span"]
+        orders = center + rng.uniform(-span, span, (options["orders"], 2))
+        restaurants = center + rng.uniform(-span, span, (options["restaurants"], 2))
+
+        results = {}
+        for mode in DISTANCE_MODES:
+            started_at = time.perf_counter()
+            matrix = distance_matrix(orders, restaurants, mode)
+            results[mode] = (matrix, time.perf_counter() - started_at)
+
+        exact, exact_time = results["geodesic"]
+        pairs = exact.size
+        self.stdout.write(f"Пар: {pairs}")
+        for mode, (matrix, elapsed) in results.items():
+            error_m = np.abs(matrix - exact).max() * 1000
+            mismatches = np.count_nonzero(np.round(matrix, 1) != np.round(exact, 1))
+            self.stdout.write(
+                f"{mode:>16}: {elapsed * 1000:9.2f} мс, "
+                f"{elapsed / pairs * 1e6:8.3f} мкс/пара, "
+                f"быстрее в {exact_time / elapsed:8.1f} раз, "
+                f"макс. погрешность {error_m:6.1f} м, "
+                f"расхождений после округления {mismatches}"
+            )
@@ -0,0 +1,130 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from django.core.management.base import BaseCommand
+
+from foodcartapp.candidates import refresh_open_orders_candidates
+from foodcartapp.models import Order, Restaurant
+from geocoder.api import fetch_coordinates
+from geocoder.models import AddressCoordinates
+from geocoder.normalization import make_address_hash
+from geocoder.throttling import RateLimiter
+
+
+class Command(BaseCommand):
+    help = "Массово геокодирует адреса заказов и ресторанов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Количество потоков")
+        parser.add_argument(
+            "--rps", type=float, default=10, help="Максимум запросов к API в секунду"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Размер пачки для bulk_update"
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Обновить даже свежие координаты"
+        )
+
+    def handle(self, *args, **options):
+        addresses = self.collect_addresses()
+        rows = self.get_rows(addresses)
+        stale_rows = [
+            row for row in rows.values() if options["force"] or row.requires_refresh()
+        ]
+        self.stdout.write(
+            f"Адресов: {len(addresses)}, требуют геокодирования: {len(stale_rows)}"
+        )
+        if stale_rows:
+            self.geocode(stale_rows, options)
+        self.fill_models(rows, options["batch_size"])
+
+    def collect_addresses(self):
+        addresses = set(
+            Order.objects.exclude(address="").values_list("address", flat=True)
+        )
+        addresses.update(
+            Restaurant.objects.exclude(address="").values_list("address", flat=True)
+        )
+        return addresses
+
+    def get_rows(self, addresses):
+        by_hash = {make_address_hash(address): address for address in addresses}
+        AddressCoordinates.objects.bulk_create(
+            [
+                AddressCoordinates(address=address, address_hash=key)
+                for key, address in by_hash.items()
+            ],
+            ignore_conflicts=True,
+        )
+        return AddressCoordinates.objects.in_bulk(by_hash, field_name="address_hash")
+
+    def geocode(self, rows, options):
+        limiter = RateLimiter(options["rps"])
+        batch_size = options["batch_size"]
+
+        def task(row):
+            limiter.wait()
+            return fetch_coordinates(row.address)
+
+        started_at = time.monotonic()
+        processed, failed, pending = 0, 0, []
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            futures = {executor.submit(task, row): row for row in rows}
+            for future in as_completed(futures):
+                row = futures[future]
+                processed += 1
+                try:
+                    coords = future.result()
+                except (
+                    requests.exceptions.RequestException,
+                    KeyError,
+                    ValueError,
+                ) as e:
+                    failed += 1
+                    self.stderr.write(f"{row.address}: {e}")
+                    continue
+
+                row.apply_result(coords)
+                pending.append(row)
+                if len(pending) >= batch_size:
+                    self.save_rows(pending, batch_size)
+                    pending = []
+
+                if processed % 100 == 0 or processed == len(rows):
+                    elapsed = time.monotonic() - started_at
+                    self.stdout.write(
+                        f"Обработано {processed}/{len(rows)}, "
+                        f"{processed / elapsed:.1f} адр/с"
+                    )
+        self.save_rows(pending, batch_size)
+
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово: {processed - failed} успешно, {failed} с ошибкой "
+                f"за {elapsed:.1f} с ({processed / elapsed:.1f} адр/с)"
+            )
+        )
+
+    def save_rows(self, rows, batch_size):
+        AddressCoordinates.objects.bulk_update(
+            rows,
+            ["latitude", "longitude", "status", "misses", "retry_after", "updated_at"],
+            batch_size=batch_size,
+        )
+
+    def fill_models(self, rows, batch_size):
+        for model in (Order, Restaurant):
+            objects = list(
+                model.objects.filter(latitude__isnull=True).exclude(address="")
+            )
+            for obj in objects:
+                row = rows.get(make_address_hash(obj.address))
+                if row:
+                    obj.latitude, obj.longitude = row.latitude, row.longitude
+            model.objects.bulk_update(
+                objects, ["latitude", "longitude"], batch_size=batch_size
+            )
+        refresh_open_orders_candidates()
@@ -0,0 +1,88 @@
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foodcartapp.candidates import refresh_candidates, refresh_open_orders_candidates
+from foodcartapp.models import Order, Restaurant
+from geocoder.models import AddressCoordinates, GeocodingJob
+from geocoder.throttling import RateLimiter
+
+
+class Command(BaseCommand):
+    help = "Фоновый обработчик очереди геокодирования заказов и ресторанов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=50, help="Задач за один проход"
+        )
+        parser.add_argument(
+            "--rps", type=float, default=10, help="Максимум запросов к API в секунду"
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=5, help="Пауза при пустой очереди, секунд"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Разобрать очередь и завершиться"
+        )
+
+    def handle(self, *args, **options):
+        limiter = RateLimiter(options["rps"])
+        while True:
+            processed = self.process_batch(options["batch_size"], limiter)
+            if processed:
+                self.stdout.write(f"Обработано задач: {processed}")
+                continue
+            if options["once"]:
+                return
+            time.sleep(options["sleep"])
+
+    def process_batch(self, batch_size, limiter):
+        jobs = GeocodingJob.claim(batch_size)
+
+        resolved, failed = {}, []
+        for job in jobs:
+            limiter.wait()
+            try:
+                resolved[job.address_hash] = self.geocode(job)
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                self.stderr.write(f"{job.address}: {e}")
+                failed.append((job, e))
+
+        with transaction.atomic():
+            for job, error in failed:
+                job.postpone(error)
+            GeocodingJob.claimed().filter(address_hash__in=resolved).delete()
+            self.fill_models(resolved)
+        return len(jobs)
+
+    def geocode(self, job):
+        row = AddressCoordinates.resolve(job.address)
+        if row.status == AddressCoordinates.STATUS_FOUND:
+            return row.latitude, row.longitude
+        return None
+
+    def fill_models(self, resolved):
+        updated = {}
+        for model in (Order, Restaurant):
+            objects = []
+            pending = model.objects.filter(
+                address_hash__in=[key for key, coords in resolved.items() if coords],
+                latitude__isnull=True,
+            )
+            for obj in pending.only("id", "address_hash"):
+                obj.latitude, obj.longitude = resolved[obj.address_hash]
+                objects.append(obj)
+            model.objects.bulk_update(objects, ["latitude", "longitude"])
+            updated[model] = objects
+
+        not_found = [key for key, coords in resolved.items() if not coords]
+        Order.objects.open().filter(
+            address_hash__in=not_found, latitude__isnull=True
+        ).touch()
+
+        if updated[Restaurant]:
+            refresh_open_orders_candidates()
+        else:
+            refresh_candidates(updated[Order])
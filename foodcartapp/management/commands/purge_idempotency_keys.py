@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Удаляет ключи идемпотентности старше IdempotencyKey.TTL"
+
+    def handle(self, *args, **options):
+        deleted = IdempotencyKey.purge_expired()
+        self.stdout.write(f"Удалено ключей: {deleted}")
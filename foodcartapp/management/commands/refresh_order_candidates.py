@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.candidates import refresh_open_orders_candidates
+from foodcartapp.models import OrderRestaurantCandidate
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает ресторанов-кандидатов для всех незавершённых заказов"
+
+    def handle(self, *args, **options):
+        refresh_open_orders_candidates()
+        self.stdout.write(
+            f"Кандидатов сохранено: {OrderRestaurantCandidate.objects.count()}"
+        )
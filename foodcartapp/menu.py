@@ -0,0 +1,31 @@
+from collections import defaultdict
+
+from foodcartapp.menu_index import menu_index
+from foodcartapp.models import OrderItem, Restaurant
+
+
+def get_capable_restaurants(orders):
+    """Для каждого заказа находит рестораны, готовые приготовить его целиком.
+
+    Делает два запроса на любой набор заказов: позиции заказов и сами
+    рестораны, а доступность товаров берёт из битового индекса меню.
+    Возвращает словарь {id заказа: [рестораны]}.
+    """
+    order_ids = [order.id for order in orders]
+    products_by_order = defaultdict(set)
+    items = OrderItem.objects.filter(order_id__in=order_ids).values_list(
+        "order_id", "product_id"
+    )
+    for order_id, product_id in items:
+        products_by_order[order_id].add(product_id)
+
+    menu = menu_index.snapshot()
+    capable_ids = {
+        order_id: menu.capable_restaurant_ids(products_by_order.get(order_id))
+        for order_id in order_ids
+    }
+    restaurants = Restaurant.objects.in_bulk(set().union(*capable_ids.values()))
+    return {
+        order_id: [restaurants[pk] for pk in sorted(ids) if pk in restaurants]
+        for order_id, ids in capable_ids.items()
+    }
@@ -0,0 +1,133 @@
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "foodcartapp:menu_index_version"
+
+
+class MenuSnapshot:
+    """Неизменяемый срез битовых карт меню на момент построения индекса.
+
+    Запросы к срезу не обращаются ни к базе, ни к кэшу, поэтому
+    для серии проверок в рамках одного запроса берут один срез.
+    """
+
+    def __init__(self, bitmaps=None, restaurant_ids=(), positions=None):
+        self.bitmaps = bitmaps or {}
+        self.restaurant_ids = list(restaurant_ids)
+        self.positions = positions or {}
+
+    def available_products(self):
+        return set(self.bitmaps)
+
+    def is_available(self, product_id, restaurant_id):
+        position = self.positions.get(restaurant_id)
+        if position is None:
+            return False
+        return bool(self.bitmaps.get(product_id, 0) >> position & 1)
+
+    def capable_restaurant_ids(self, product_ids):
+        if not product_ids:
+            return []
+        bitmap = -1
+        for product_id in product_ids:
+            bitmap &= self.bitmaps.get(product_id, 0)
+            if not bitmap:
+                return []
+        return [
+            restaurant_id
+            for position, restaurant_id in enumerate(self.restaurant_ids)
+            if bitmap >> position & 1
+        ]
+
+
+class MenuIndex:
+    """Битовые карты доступности товаров по ресторанам.
+
+    Для каждого товара хранится целое число, в котором i-й бит означает,
+    что товар в продаже в i-м ресторане. Рестораны, способные выполнить
+    заказ, находятся побитовым И карт его товаров. Индекс строится на процесс,
+    а метка его версии хранится в общем кэше и меняется сигналами после
+    фиксации транзакций, меняющих меню, товары и рестораны. Версия сверяется
+    в snapshot(), так что на серию проверок уходит одно обращение к кэшу.
+    Чтобы изменения из других процессов не терялись, если кэш у каждого
+    процесса свой, индекс целиком перестраивается раз в max_age секунд.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self.version = None
+        self._built_at = 0
+        self._snapshot = MenuSnapshot()
+        self._lock = threading.Lock()
+
+    def ensure_fresh(self):
+        from foodcartapp.models import RestaurantMenuItem
+
+        version = get_menu_index_version()
+        with self._lock:
+            if (
+                version == self.version
+                and time.monotonic() - self._built_at <= self.max_age
+            ):
+                return self._snapshot
+            bitmaps = {}
+            restaurant_ids = []
+            positions = {}
+            menu_items = RestaurantMenuItem.objects.filter(
+                availability=True
+            ).values_list("product_id", "restaurant_id")
+            for product_id, restaurant_id in menu_items:
+                if restaurant_id not in positions:
+                    positions[restaurant_id] = len(restaurant_ids)
+                    restaurant_ids.append(restaurant_id)
+                bitmaps[product_id] = bitmaps.get(product_id, 0) | (
+                    1 << positions[restaurant_id]
+                )
+            self._snapshot = MenuSnapshot(bitmaps, restaurant_ids, positions)
+            self.version = version
+            self._built_at = time.monotonic()
+            return self._snapshot
+
+    def snapshot(self):
+        return self.ensure_fresh()
+
+    def reset(self):
+        with self._lock:
+            self.version = None
+
+    def available_products(self):
+        return self.snapshot().available_products()
+
+    def is_available(self, product_id, restaurant_id):
+        return self.snapshot().is_available(product_id, restaurant_id)
+
+    def capable_restaurant_ids(self, product_ids):
+        return self.snapshot().capable_restaurant_ids(product_ids)
+
+
+def get_menu_index_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_menu_index_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def refresh_menu_index():
+    menu_index.reset()
+    bump_menu_index_version()
+
+
+def invalidate_menu_index():
+    transaction.on_commit(refresh_menu_index)
+
+
+menu_index = MenuIndex()
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foodcartapp", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderRestaurantCandidate",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("distance_km", models.FloatField(verbose_name="расстояние, км")),
+                (
+                    "rank",
+                    models.PositiveSmallIntegerField(
+                        verbose_name="место по расстоянию"
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="candidates",
+                        to="foodcartapp.order",
+                        verbose_name="заказ",
+                    ),
+                ),
+                (
+                    "restaurant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="order_candidates",
+                        to="foodcartapp.restaurant",
+                        verbose_name="ресторан",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "ресторан-кандидат",
+                "verbose_name_plural": "рестораны-кандидаты",
+                "ordering": ["order", "rank"],
+                "indexes": [
+                    models.Index(
+                        fields=["order", "rank"], name="foodcartapp_order_i_f1d2bf_idx"
+                    )
+                ],
+                "unique_together": {("order", "restaurant")},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foodcartapp", "0002_orderrestaurantcandidate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="restaurant",
+            name="capacity",
+            field=models.PositiveSmallIntegerField(
+                default=10,
+                help_text="Сколько незавершённых заказов ресторан готовит одновременно",
+                verbose_name="вместимость",
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:46
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_totals(apps, schema_editor):
+    Order = apps.get_model("foodcartapp", "Order")
+    OrderItem = apps.get_model("foodcartapp", "OrderItem")
+    totals = (
+        OrderItem.objects.filter(order=OuterRef("pk"))
+        .values("order")
+        .annotate(total=Sum(F("quantity") * F("fixed_price")))
+        .values("total")
+    )
+    Order.objects.update(
+        total=Coalesce(
+            Subquery(totals),
+            Value(0),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foodcartapp", "0003_restaurant_capacity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="total",
+            field=models.DecimalField(
+                db_index=True,
+                decimal_places=2,
+                default=0,
+                editable=False,
+                max_digits=12,
+                verbose_name="Сумма заказа",
+            ),
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
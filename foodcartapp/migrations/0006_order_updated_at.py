@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:48
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_updated_at(apps, schema_editor):
+    Order = apps.get_model("foodcartapp", "Order")
+    Order.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foodcartapp", "0005_order_created_at_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, verbose_name="Дата изменения"
+            ),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
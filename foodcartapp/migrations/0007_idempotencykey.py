@@ -0,0 +1,52 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foodcartapp", "0006_order_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(max_length=255, unique=True, verbose_name="ключ"),
+                ),
+                (
+                    "fingerprint",
+                    models.CharField(max_length=64, verbose_name="хэш тела запроса"),
+                ),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(
+                        null=True, verbose_name="код ответа"
+                    ),
+                ),
+                ("response", models.JSONField(null=True, verbose_name="ответ")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="создан"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "ключ идемпотентности",
+                "verbose_name_plural": "ключи идемпотентности",
+            },
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:01
+
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Копия geocoder.normalization на момент миграции: хэши должны совпадать
+# с AddressCoordinates.address_hash, а код приложения может меняться дальше
+
+ABBREVIATIONS = {
+    "г": "город",
+    "обл": "область",
+    "р-н": "район",
+    "мкр": "микрорайон",
+    "ул": "улица",
+    "пр": "проспект",
+    "пр-т": "проспект",
+    "просп": "проспект",
+    "пр-д": "проезд",
+    "пер": "переулок",
+    "пл": "площадь",
+    "б-р": "бульвар",
+    "бул": "бульвар",
+    "наб": "набережная",
+    "ш": "шоссе",
+    "д": "дом",
+    "корп": "корпус",
+    "к": "корпус",
+    "стр": "строение",
+}
+
+TOKEN_RE = re.compile(r"\w+(?:-\w+)*")
+
+
+def normalize_address(address):
+    text = unicodedata.normalize("NFKC", address).casefold().replace("ё", "е")
+    tokens = TOKEN_RE.findall(text)
+    return " ".join(ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+def make_address_hash(address):
+    normalized = normalize_address(address)
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def fill_address_hash(apps, schema_editor):
+    for model_name in ("Order", "Restaurant"):
+        model = apps.get_model("foodcartapp", model_name)
+        objects = list(model.objects.exclude(address="").only("id", "address"))
+        for obj in objects:
+            obj.address_hash = make_address_hash(obj.address)
+        model.objects.bulk_update(objects, ["address_hash"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foodcartapp", "0007_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="address_hash",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=32,
+                verbose_name="Хэш нормализованного адреса",
+            ),
+        ),
+        migrations.AddField(
+            model_name="restaurant",
+            name="address_hash",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=32,
+                verbose_name="хэш нормализованного адреса",
+            ),
+        ),
+        migrations.RunPython(fill_address_hash, migrations.RunPython.noop),
+    ]
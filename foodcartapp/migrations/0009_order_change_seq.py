@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    OrderChangeCounter = apps.get_model("foodcartapp", "OrderChangeCounter")
+    OrderChangeCounter.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foodcartapp", "0008_address_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderChangeCounter",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "value",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="последний номер изменения"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "счётчик изменений заказов",
+                "verbose_name_plural": "счётчики изменений заказов",
+            },
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="change_seq",
+            field=models.PositiveBigIntegerField(
+                db_index=True,
+                default=0,
+                editable=False,
+                help_text="Растёт в порядке фиксации транзакций, по нему читает лента дашборда",
+                verbose_name="Номер изменения",
+            ),
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foodcartapp", "0009_order_change_seq"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="claimed_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="взят в работу"
+            ),
+        ),
+    ]
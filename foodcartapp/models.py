@@ -1,13 +1,30 @@
-from django.db import models
+import time
+
+from django.db import IntegrityError, models, transaction
 from django.core.validators import MinValueValidator
 
-from django.db.models import Count, Sum, F
+from django.db.models import (
+    Count,
+    DecimalField,
+    Exists,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
 
 from django.core.exceptions import ValidationError
-from geocoder.models import AddressCoordinates
+from geocoder.models import AddressCoordinates, GeocodingJob
+from geocoder.normalization import make_address_hash
 
-from foodcartapp.utils import calculate_distance, logger
+from foodcartapp.dirty_fields import DirtyFieldsMixin
+from foodcartapp.distances import rank_by_distance
+from foodcartapp.menu_index import menu_index
+from foodcartapp.spatial import restaurant_index
 
 
 def validate_positive(value):
@@ -15,7 +32,62 @@ def validate_positive(value):
         raise ValidationError("Итоговая цена не может быть отрицательной.")
 
 
-class Order(models.Model):
+def items_total_subquery():
+    totals = (
+        OrderItem.objects.filter(order=OuterRef("pk"))
+        .values("order")
+        .annotate(total=Sum(F("quantity") * F("fixed_price")))
+        .values("total")
+    )
+    return Coalesce(
+        Subquery(totals),
+        Value(0),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+class OrderQuerySet(models.QuerySet):
+    def open(self):
+        return self.exclude(status="completed")
+
+    def with_totals(self):
+        return self.annotate(items_total=items_total_subquery())
+
+    def with_item_count(self):
+        counts = (
+            OrderItem.objects.filter(order=OuterRef("pk"))
+            .values("order")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return self.annotate(items_count=Coalesce(Subquery(counts), Value(0)))
+
+    def with_address_status(self):
+        not_found = AddressCoordinates.objects.filter(
+            address_hash=OuterRef("address_hash"),
+            status=AddressCoordinates.STATUS_NOT_FOUND,
+        )
+        return self.annotate(address_not_found=Exists(not_found))
+
+    def update_totals(self):
+        from foodcartapp.changes import schedule_changes_publish
+
+        order_ids = list(self.values_list("pk", flat=True))
+        updated = self.update(total=items_total_subquery(), updated_at=timezone.now())
+        schedule_changes_publish(order_ids)
+        return updated
+
+    def touch(self):
+        """Отмечает заказы изменёнными для ленты обновлений менеджера."""
+        from foodcartapp.changes import schedule_changes_publish
+
+        order_ids = list(self.values_list("pk", flat=True))
+        updated = self.update(updated_at=timezone.now())
+        schedule_changes_publish(order_ids)
+        return updated
+
+
+class Order(DirtyFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ("new", "Новый"),
         ("processing", "В обработке"),
@@ -61,66 +133,100 @@ class Order(models.Model):
     lastname = models.CharField("Фамилия", max_length=50)
     phonenumber = PhoneNumberField("Номер телефона", region="RU")
     address = models.CharField("Адрес", max_length=200)
-    created_at = models.DateTimeField("Дата создания", auto_now_add=True)
+    address_hash = models.CharField(
+        "Хэш нормализованного адреса",
+        max_length=32,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
+    created_at = models.DateTimeField("Дата создания", auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True, db_index=True)
+    change_seq = models.PositiveBigIntegerField(
+        "Номер изменения",
+        default=0,
+        db_index=True,
+        editable=False,
+        help_text="Растёт в порядке фиксации транзакций, по нему читает лента дашборда",
+    )
     called_at = models.DateTimeField("Дата звонка", null=True, blank=True)
     delivered_at = models.DateTimeField("Дата доставки", null=True, blank=True)
+    total = models.DecimalField(
+        "Сумма заказа",
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        db_index=True,
+    )
+
+    objects = OrderQuerySet.as_manager()
 
     def total_price(self):
+        if hasattr(self, "items_total"):
+            return self.items_total
         return (
             self.items.aggregate(total=Sum(F("quantity") * F("fixed_price")))["total"]
             or 0
         )
 
-    def get_available_restaurants(self):
-        return (
-            Restaurant.objects.filter(
-                menu_items__product__in=self.items.values("product"),
-                menu_items__availability=True,
-            )
-            .annotate(total_products=Count("menu_items__product", distinct=True))
-            .filter(total_products=self.items.count())
-            .distinct()
+    def get_available_restaurants(self, menu=None):
+        """Рестораны, способные приготовить заказ целиком.
+
+        При обходе многих заказов передавайте один menu_index.snapshot(),
+        чтобы не сверять версию индекса на каждом заказе.
+        """
+        menu = menu or menu_index.snapshot()
+        product_ids = set(self.items.values_list("product_id", flat=True))
+        return Restaurant.objects.filter(
+            pk__in=menu.capable_restaurant_ids(product_ids)
         )
 
     def get_restaurants_with_distances(self):
+        candidates = {self.id: list(self.get_available_restaurants())}
+        return rank_by_distance([self], candidates)[self.id]
+
+    def get_nearest_restaurants(self, k=None, radius_km=None):
         if not self.latitude or not self.longitude:
             return []
-        restaurants = []
-        for restaurant in self.get_available_restaurants():
-            if not restaurant.latitude or not restaurant.longitude:
-                continue
-            try:
-                dist = calculate_distance(
-                    (self.latitude, self.longitude),
-                    (restaurant.latitude, restaurant.longitude),
-                )
-                restaurants.append({"restaurant": restaurant, "distance": dist})
-            except Exception as e:
-                logger.error(f"Ошибка расчета расстояния: {str(e)}")
-        return sorted(restaurants, key=lambda x: x["distance"])
+        return self.get_available_restaurants().nearest_to(
+            self.latitude, self.longitude, k=k, radius_km=radius_km
+        )
 
     def save(self, *args, **kwargs):
-
-        if self.address and (not self.pk or self.address != self._get_old_address()):
-            coords, _ = AddressCoordinates.objects.get_or_create(address=self.address)
-            self.latitude = coords.latitude
-            self.longitude = coords.longitude
+        from foodcartapp.candidates import schedule_candidates_refresh
+
+        address_changed = self.has_changed("address") and self.address
+        if address_changed:
+            self.address_hash = make_address_hash(self.address)
+            self.latitude, self.longitude = AddressCoordinates.lookup(self.address)
+            if self.latitude is None:
+                GeocodingJob.enqueue(self.address)
         super().save(*args, **kwargs)
-
-    def _get_old_address(self):
-        if self.pk:
-            return Order.objects.get(pk=self.pk).address
-        return None
+        if address_changed:
+            schedule_candidates_refresh([self.pk])
 
     class Meta:
         verbose_name = "заказ"
         verbose_name_plural = "заказы"
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
 
     def __str__(self):
         return f'Заказ №{self.id} от {self.created_at.strftime("%d-%m-%Y %H:%M")}'
 
 
+class OrderChangeCounter(models.Model):
+    value = models.PositiveBigIntegerField("последний номер изменения", default=0)
+
+    class Meta:
+        verbose_name = "счётчик изменений заказов"
+        verbose_name_plural = "счётчики изменений заказов"
+
+    def __str__(self):
+        return str(self.value)
+
+
 class OrderItem(models.Model):
     order = models.ForeignKey(
         Order, on_delete=models.CASCADE, related_name="items", verbose_name="заказ"
@@ -152,13 +258,60 @@ class OrderItem(models.Model):
         return f"{self.product.name} x {self.quantity}"
 
 
-class Restaurant(models.Model):
+class OrderRestaurantCandidate(models.Model):
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="candidates",
+        verbose_name="заказ",
+    )
+    restaurant = models.ForeignKey(
+        "Restaurant",
+        on_delete=models.CASCADE,
+        related_name="order_candidates",
+        verbose_name="ресторан",
+    )
+    distance_km = models.FloatField("расстояние, км")
+    rank = models.PositiveSmallIntegerField("место по расстоянию")
+
+    class Meta:
+        verbose_name = "ресторан-кандидат"
+        verbose_name_plural = "рестораны-кандидаты"
+        ordering = ["order", "rank"]
+        unique_together = [["order", "restaurant"]]
+        indexes = [models.Index(fields=["order", "rank"])]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.restaurant_id} ({self.distance_km} км)"
+
+
+class RestaurantQuerySet(models.QuerySet):
+    def nearest_to(self, latitude, longitude, k=None, radius_km=None):
+        ids = set(self.values_list("id", flat=True))
+        found = restaurant_index.nearest(latitude, longitude, k, radius_km, ids)
+        restaurants = Restaurant.objects.in_bulk([pk for pk, _ in found])
+        nearest = []
+        for pk, distance in found:
+            if pk in restaurants:
+                restaurants[pk].distance = round(distance, 1)
+                nearest.append(restaurants[pk])
+        return nearest
+
+
+class Restaurant(DirtyFieldsMixin, models.Model):
     name = models.CharField("название", max_length=50)
     address = models.CharField(
         "адрес",
         max_length=100,
         blank=True,
     )
+    address_hash = models.CharField(
+        "хэш нормализованного адреса",
+        max_length=32,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
     contact_phone = models.CharField(
         "контактный телефон",
         max_length=50,
@@ -168,15 +321,20 @@ class Restaurant(models.Model):
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
 
-    def save(self, *args, **kwargs):
-        from geocoder.models import AddressCoordinates
+    capacity = models.PositiveSmallIntegerField(
+        "вместимость",
+        default=10,
+        help_text="Сколько незавершённых заказов ресторан готовит одновременно",
+    )
 
-        if self.address and (
-            not self.pk or self.address != Restaurant.objects.get(pk=self.pk).address
-        ):
-            coords, _ = AddressCoordinates.objects.get_or_create(address=self.address)
-            self.latitude = coords.latitude
-            self.longitude = coords.longitude
+    objects = RestaurantQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        if self.has_changed("address") and self.address:
+            self.address_hash = make_address_hash(self.address)
+            self.latitude, self.longitude = AddressCoordinates.lookup(self.address)
+            if self.latitude is None:
+                GeocodingJob.enqueue(self.address)
         super().save(*args, **kwargs)
 
     class Meta:
@@ -200,10 +358,7 @@ class ProductCategory(models.Model):
 
 class ProductQuerySet(models.QuerySet):
     def available(self):
-        products = RestaurantMenuItem.objects.filter(availability=True).values_list(
-            "product"
-        )
-        return self.filter(pk__in=products)
+        return self.filter(pk__in=menu_index.available_products())
 
 
 class Product(models.Model):
@@ -282,3 +437,102 @@ class RestaurantMenuItem(models.Model):
 
     def __str__(self):
         return f"{self.restaurant.name} - {self.product.name}"
+
+
+class IdempotencyKey(models.Model):
+    """Ответ на запрос с заголовком Idempotency-Key.
+
+    Пока запрос выполняется, response пуст: повторы с тем же ключом ждут
+    первый запрос, а затем получают сохранённый ответ без повторной
+    обработки. Если владелец не ответил за LEASE (например, процесс упал),
+    ключ перехватывает следующий повтор. Записи живут TTL, после чего ключ
+    можно использовать снова, а удаляет их команда purge_idempotency_keys.
+    """
+
+    TTL = timezone.timedelta(hours=24)
+    LEASE = timezone.timedelta(seconds=60)
+    WAIT_TIMEOUT = 10
+    POLL_INTERVAL = 0.1
+
+    key = models.CharField("ключ", max_length=255, unique=True)
+    fingerprint = models.CharField("хэш тела запроса", max_length=64)
+    status_code = models.PositiveSmallIntegerField("код ответа", null=True)
+    response = models.JSONField("ответ", null=True)
+    created_at = models.DateTimeField("создан", auto_now_add=True, db_index=True)
+    claimed_at = models.DateTimeField("взят в работу", default=timezone.now)
+
+    class Meta:
+        verbose_name = "ключ идемпотентности"
+        verbose_name_plural = "ключи идемпотентности"
+
+    def __str__(self):
+        return self.key
+
+    @classmethod
+    def acquire(cls, key, fingerprint):
+        """Занимает ключ. Возвращает запись и признак, что её владелец — мы."""
+        while True:
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(key=key, fingerprint=fingerprint), True
+            except IntegrityError:
+                existing = cls.objects.filter(key=key).first()
+                if existing is None:
+                    continue
+                if existing.take_over(fingerprint):
+                    return existing, True
+                return existing, False
+
+    @classmethod
+    def purge_expired(cls):
+        return cls.objects.filter(created_at__lt=timezone.now() - cls.TTL).delete()[0]
+
+    def take_over(self, fingerprint):
+        """Перехватывает просроченный ключ или брошенный владельцем запрос.
+
+        Условный UPDATE срабатывает только у одного из конкурентов: он
+        проверяет, что запись не изменилась с момента чтения.
+        """
+        now = timezone.now()
+        record = IdempotencyKey.objects.filter(pk=self.pk, claimed_at=self.claimed_at)
+        if self.created_at < now - self.TTL:
+            taken = record.filter(created_at=self.created_at).update(
+                fingerprint=fingerprint,
+                status_code=None,
+                response=None,
+                created_at=now,
+                claimed_at=now,
+            )
+        elif (
+            not self.is_complete
+            and self.fingerprint == fingerprint
+            and self.claimed_at < now - self.LEASE
+        ):
+            taken = record.filter(status_code__isnull=True).update(claimed_at=now)
+        else:
+            return False
+        if taken:
+            self.refresh_from_db()
+        return bool(taken)
+
+    @property
+    def is_complete(self):
+        return self.status_code is not None
+
+    def wait(self):
+        """Ждёт ответа первого запроса. None, если он не успел или упал."""
+        deadline = time.monotonic() + self.WAIT_TIMEOUT
+        while not self.is_complete:
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.POLL_INTERVAL)
+            try:
+                self.refresh_from_db(fields=["status_code", "response"])
+            except IdempotencyKey.DoesNotExist:
+                return None
+        return self
+
+    def complete(self, status_code, response):
+        self.status_code = status_code
+        self.response = response
+        self.save(update_fields=["status_code", "response"])
@@ -0,0 +1,41 @@
+from django.db import transaction
+
+
+class PendingBatch:
+    """Набор id, который после фиксации транзакции уйдёт в flush одним вызовом."""
+
+    def __init__(self, key, ids, flush):
+        self.key = key
+        self.ids = ids
+        self.flush = flush
+        self.flushed = False
+
+    def __call__(self):
+        self.flushed = True
+        self.flush(self.ids)
+
+
+def schedule_on_commit(key, ids, flush, using=None):
+    """Копит ids до фиксации транзакции и передаёт их в flush одним вызовом.
+
+    Пакет хранится в очереди on_commit соединения и привязан к текущему
+    атомарному блоку, поэтому при откате блока выбрасывается вместе
+    с накопленными id. Вне транзакции flush вызывается сразу.
+    """
+    ids = set(ids)
+    if not ids:
+        return
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block:
+        scope = set(connection.savepoint_ids)
+        for savepoint_ids, callback, _ in connection.run_on_commit:
+            if (
+                isinstance(callback, PendingBatch)
+                and not callback.flushed
+                and callback.key == key
+                and savepoint_ids == scope
+            ):
+                callback.ids |= ids
+                return
+
+    transaction.on_commit(PendingBatch(key, ids, flush), using=using)
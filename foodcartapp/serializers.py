@@ -1,12 +1,19 @@
+from django.db import transaction
 from rest_framework import serializers
 from phonenumber_field.serializerfields import PhoneNumberField
+from geocoder.models import AddressCoordinates, GeocodingJob
+from geocoder.normalization import make_address_hash
+from .candidates import schedule_candidates_refresh
 from .models import Order, OrderItem, Product
 
 
+def load_products(product_ids):
+    return Product.objects.only('id', 'name', 'price', 'is_available').in_bulk(product_ids)
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
-    product = serializers.PrimaryKeyRelatedField(
-        queryset=Product.objects.all(),
-        error_messages={'does_not_exist': 'Товар с ID {pk_value} не существует'}
+    product = serializers.IntegerField(
+        error_messages={'invalid': 'Некорректный ID товара'}
     )
     quantity = serializers.IntegerField(
         min_value=1,
@@ -22,6 +29,95 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['product', 'quantity']
 
 
+class OrderListSerializer(serializers.ListSerializer):
+    """Пакет заказов от партнёров.
+
+    Заказы проверяются по отдельности: ошибки одного не мешают сохранить
+    остальные, а results сообщает итог по каждому заказу в порядке запроса.
+    Сохраняются все валидные заказы разом через bulk_create.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError('Ожидается список заказов')
+        if not data:
+            raise serializers.ValidationError('Список заказов пуст')
+        if self.max_length is not None and len(data) > self.max_length:
+            raise serializers.ValidationError(
+                f'В пакете не больше {self.max_length} заказов'
+            )
+
+        if 'products' not in self.context:
+            self.context['products'] = load_products(self.collect_product_ids(data))
+
+        self.results = []
+        validated = []
+        for order in data:
+            try:
+                validated.append(self.child.run_validation(order))
+            except serializers.ValidationError as e:
+                self.results.append({'errors': e.detail})
+            else:
+                self.results.append(None)
+        return validated
+
+    def collect_product_ids(self, data):
+        """ID товаров всех заказов, приведённые так же, как их проверит OrderItemSerializer."""
+        product_field = OrderItemSerializer().fields['product']
+        product_ids = set()
+        for order in data:
+            if not isinstance(order, dict) or not isinstance(order.get('items'), list):
+                continue
+            for item in order['items']:
+                if not isinstance(item, dict) or 'product' not in item:
+                    continue
+                try:
+                    product_ids.add(product_field.to_internal_value(item['product']))
+                except serializers.ValidationError:
+                    continue
+        return product_ids
+
+    @transaction.atomic
+    def create(self, validated_data):
+        coordinates = AddressCoordinates.lookup_many(
+            {order_data['address'] for order_data in validated_data}
+        )
+        orders = []
+        for order_data in validated_data:
+            items_data = order_data['items']
+            order = Order(**{k: v for k, v in order_data.items() if k != 'items'})
+            order.address_hash = make_address_hash(order.address)
+            order.latitude, order.longitude = coordinates[order.address]
+            order.total = sum(
+                item['product'].price * item['quantity'] for item in items_data
+            )
+            orders.append(order)
+        Order.objects.bulk_create(orders)
+
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    product=item_data['product'],
+                    quantity=item_data['quantity'],
+                    fixed_price=item_data['product'].price,
+                )
+                for order, order_data in zip(orders, validated_data)
+                for item_data in order_data['items']
+            ]
+        )
+        GeocodingJob.enqueue_many(
+            {order.address for order in orders if order.latitude is None}
+        )
+        schedule_candidates_refresh([order.id for order in orders])
+
+        created = iter(orders)
+        for index, result in enumerate(self.results):
+            if result is None:
+                self.results[index] = {'id': next(created).id}
+        return orders
+
+
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(
         many=True,
@@ -54,15 +150,38 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ['id', 'firstname', 'lastname', 'phonenumber', 'address', 'items']
         read_only_fields = ['id']
+        list_serializer_class = OrderListSerializer
 
     def validate_items(self, value):
         if not value:
             raise serializers.ValidationError("Заказ должен содержать хотя бы один товар")
+
+        products = self.context.get('products')
+        if products is None:
+            products = load_products({item['product'] for item in value})
+        errors = []
+        for item in value:
+            product = products.get(item['product'])
+            if product is None:
+                errors.append({'product': [f"Товар с ID {item['product']} не существует"]})
+            elif not product.is_available:
+                errors.append({'product': [f'Товар «{product.name}» недоступен для заказа']})
+            else:
+                errors.append({})
+                item['product'] = product
+        if any(errors):
+            raise serializers.ValidationError(errors)
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
+        order = Order.objects.create(
+            **validated_data,
+            total=sum(
+                item['product'].price * item['quantity'] for item in items_data
+            ),
+        )
 
         order_items = [
             OrderItem(
@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .candidates import schedule_candidates_refresh
+from .changes import schedule_changes_publish
+from .menu_index import invalidate_menu_index
+from .models import Order, OrderItem, Product, Restaurant, RestaurantMenuItem
+from .spatial import restaurant_index
+from .totals import schedule_totals_refresh
+
+
+@receiver(post_save, sender=Restaurant)
+def update_restaurant_index(sender, instance, **kwargs):
+    point = (instance.id, instance.latitude, instance.longitude)
+    transaction.on_commit(lambda: restaurant_index.update_point(*point))
+
+
+@receiver(post_delete, sender=Restaurant)
+def remove_from_restaurant_index(sender, instance, **kwargs):
+    restaurant_id = instance.id
+    transaction.on_commit(lambda: restaurant_index.remove(restaurant_id))
+
+
+@receiver([post_save, post_delete], sender=RestaurantMenuItem)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Restaurant)
+def reset_menu_index(sender, **kwargs):
+    invalidate_menu_index()
+
+
+@receiver(post_save, sender=Order)
+def publish_order_change(sender, instance, **kwargs):
+    schedule_changes_publish([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def update_order_total(sender, instance, **kwargs):
+    schedule_totals_refresh([instance.order_id])
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def refresh_order_candidates(sender, instance, **kwargs):
+    schedule_candidates_refresh([instance.order_id])
+
+
+@receiver([post_save, post_delete], sender=RestaurantMenuItem)
+def refresh_candidates_for_product(sender, instance, **kwargs):
+    orders = Order.objects.exclude(status="completed").filter(
+        items__product_id=instance.product_id
+    )
+    schedule_candidates_refresh(orders.values_list("id", flat=True).distinct())
+
+
+@receiver(post_save, sender=Restaurant)
+def refresh_candidates_for_restaurant(sender, instance, update_fields, **kwargs):
+    # Кандидаты зависят только от координат ресторана, меню отслеживается отдельно
+    coordinates = {"latitude", "longitude"}
+    if update_fields is not None and not coordinates & set(update_fields):
+        return
+    if not any(instance.has_changed(field) for field in coordinates):
+        return
+    orders = Order.objects.exclude(status="completed").filter(latitude__isnull=False)
+    schedule_candidates_refresh(orders.values_list("id", flat=True))
@@ -0,0 +1,208 @@
+import math
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+
+from foodcartapp.distances import EARTH_RADIUS_KM, distance_matrix
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class GridIndex:
+    """Сетка по широте и долготе для поиска ближайших точек.
+
+    Точки раскладываются по ячейкам размером cell_size градусов, запрос
+    с радиусом просматривает только ячейки, попадающие в его окрестность.
+    """
+
+    def __init__(self, cell_size=0.05):
+        self.cell_size = cell_size
+        self.points = {}
+        self.cells = defaultdict(set)
+
+    def cell_of(self, latitude, longitude):
+        return (
+            math.floor(latitude / self.cell_size),
+            math.floor(longitude / self.cell_size),
+        )
+
+    def add(self, key, latitude, longitude):
+        self.remove(key)
+        self.points[key] = (latitude, longitude)
+        self.cells[self.cell_of(latitude, longitude)].add(key)
+
+    def copy(self):
+        grid = GridIndex(self.cell_size)
+        grid.points = dict(self.points)
+        for cell, keys in self.cells.items():
+            grid.cells[cell] = set(keys)
+        return grid
+
+    def remove(self, key):
+        point = self.points.pop(key, None)
+        if point is None:
+            return
+        cell = self.cell_of(*point)
+        self.cells[cell].discard(key)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def candidates(self, latitude, longitude, radius_km):
+        if radius_km is None:
+            return list(self.points)
+
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+        lon_span = min(radius_km / (KM_PER_DEGREE * cos_lat), 180)
+        lat_from, lon_from = self.cell_of(latitude - lat_span, longitude - lon_span)
+        lat_to, lon_to = self.cell_of(latitude + lat_span, longitude + lon_span)
+
+        if (lat_to - lat_from + 1) * (lon_to - lon_from + 1) > len(self.cells):
+            return list(self.points)
+        keys = []
+        for lat_cell in range(lat_from, lat_to + 1):
+            for lon_cell in range(lon_from, lon_to + 1):
+                keys.extend(self.cells.get((lat_cell, lon_cell), ()))
+        return keys
+
+    def nearest(self, latitude, longitude, k=None, radius_km=None, keys=None):
+        candidates = self.candidates(latitude, longitude, radius_km)
+        if keys is not None:
+            candidates = [key for key in candidates if key in keys]
+        if not candidates:
+            return []
+
+        distances = distance_matrix(
+            [(latitude, longitude)], [self.points[key] for key in candidates]
+        )[0]
+        order = np.argsort(distances, kind="stable")
+        if radius_km is not None:
+            order = order[distances[order] <= radius_km]
+        if k is not None:
+            order = order[:k]
+        return [(candidates[i], float(distances[i])) for i in order]
+
+    def __len__(self):
+        return len(self.points)
+
+
+class RestaurantIndex:
+    """Индекс координат ресторанов на процесс.
+
+    Обновляется сигналами после фиксации транзакций, сохраняющих
+    и удаляющих рестораны, и сверяется с загруженными ресторанами в sync().
+    Целиком перестраивается раз в max_age секунд, чтобы подхватить
+    изменения, сделанные другими процессами.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._grid = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+
+    def get_grid(self):
+        from foodcartapp.models import Restaurant
+
+        with self._lock:
+            if self._grid is None or time.monotonic() - self._built_at > self.max_age:
+                grid = GridIndex()
+                restaurants = Restaurant.objects.filter(
+                    latitude__isnull=False, longitude__isnull=False
+                ).values_list("id", "latitude", "longitude")
+                for restaurant_id, latitude, longitude in restaurants:
+                    grid.add(restaurant_id, latitude, longitude)
+                self._grid = grid
+                self._built_at = time.monotonic()
+            return self._grid
+
+    def update(self, restaurant):
+        self.update_point(restaurant.id, restaurant.latitude, restaurant.longitude)
+
+    def update_point(self, restaurant_id, latitude, longitude):
+        with self._lock:
+            if self._grid is None:
+                return
+            if latitude is None or longitude is None:
+                self._grid.remove(restaurant_id)
+            else:
+                self._grid.add(restaurant_id, latitude, longitude)
+
+    def remove(self, restaurant_id):
+        with self._lock:
+            if self._grid is not None:
+                self._grid.remove(restaurant_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._grid = None
+
+    def nearest(self, latitude, longitude, k=None, radius_km=None, ids=None, grid=None):
+        if grid is None:
+            grid = self.get_grid()
+        with self._lock:
+            return grid.nearest(latitude, longitude, k, radius_km, ids)
+
+    def sync(self, restaurants):
+        """Сверяет точки индекса с только что загруженными ресторанами.
+
+        Загруженные из базы координаты свежее индекса: они могли поменяться
+        в другом процессе или в транзакции, которая ещё не зафиксирована.
+        Возвращает сетку для поиска. Внутри транзакции координаты ещё могут
+        откатиться, поэтому расхождения накладываются на копию сетки, и общий
+        индекс процесса видит только зафиксированные данные.
+        """
+        grid = self.get_grid()
+        with self._lock:
+            changed = []
+            for restaurant in restaurants:
+                point = (restaurant.latitude, restaurant.longitude)
+                if None in point:
+                    point = None
+                if grid.points.get(restaurant.id) != point:
+                    changed.append((restaurant.id, point))
+            if not changed:
+                return grid
+            if transaction.get_connection().in_atomic_block:
+                grid = grid.copy()
+            for restaurant_id, point in changed:
+                if point is None:
+                    grid.remove(restaurant_id)
+                else:
+                    grid.add(restaurant_id, *point)
+        return grid
+
+    def rank(self, orders, candidates, k=None, radius_km=None):
+        """Ближайшие подходящие рестораны для каждого заказа.
+
+        candidates — словарь {id заказа: список ресторанов}. Возвращает
+        {id заказа: [{"restaurant": ..., "distance": км}, ...]} в том же
+        виде, что и rank_by_distance, но не дальше radius_km и не больше k
+        ресторанов на заказ.
+        """
+        restaurants = {
+            restaurant.id: restaurant
+            for order in orders
+            for restaurant in candidates.get(order.id, [])
+        }
+        grid = self.sync(restaurants.values())
+
+        ranked = {}
+        for order in orders:
+            ranked[order.id] = []
+            if order.latitude is None or order.longitude is None:
+                continue
+            ids = {restaurant.id for restaurant in candidates.get(order.id, [])}
+            with self._lock:
+                found = grid.nearest(order.latitude, order.longitude, k, radius_km, ids)
+            ranked[order.id] = [
+                {"restaurant": restaurants[key], "distance": round(distance, 1)}
+                for key, distance in found
+            ]
+        return ranked
+
+
+restaurant_index = RestaurantIndex()
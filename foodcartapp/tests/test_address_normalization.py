@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase, TestCase
+
+from geocoder.models import AddressCoordinates, coordinates_cache
+from geocoder.normalization import make_address_hash, normalize_address
+
+
+class NormalizeAddressTestCase(SimpleTestCase):
+
+    def test_ignores_case_whitespace_and_punctuation(self):
+        """Проверка, что регистр, пробелы и знаки препинания не различаются"""
+        self.assertEqual(
+            normalize_address("Москва, Тверская 1"),
+            normalize_address("москва,  тверская, 1"),
+        )
+
+    def test_expands_abbreviations(self):
+        """Проверка, что сокращения раскрываются"""
+        self.assertEqual(
+            normalize_address("Калуга, пр-т Ленина, д. 5"),
+            "калуга проспект ленина дом 5",
+        )
+        self.assertEqual(
+            normalize_address("Москва, ул. Новый Арбат, 55"),
+            normalize_address("МОСКВА УЛИЦА НОВЫЙ АРБАТ 55"),
+        )
+
+    def test_hash_has_fixed_width(self):
+        """Проверка, что хэш не зависит от длины адреса"""
+        self.assertEqual(len(make_address_hash("а")), 32)
+        self.assertEqual(len(make_address_hash("Москва, " * 50)), 32)
+
+
+class AddressCoordinatesHashTestCase(TestCase):
+
+    def setUp(self):
+        coordinates_cache.clear()
+
+    def test_equivalent_addresses_share_row(self):
+        """Проверка, что варианты записи одного адреса попадают в одну строку"""
+        AddressCoordinates.objects.create(
+            address="Москва, ул. Тверская, 1", latitude=55.76, longitude=37.61
+        )
+
+        coords = AddressCoordinates.lookup("москва улица тверская 1")
+
+        self.assertEqual(coords, (55.76, 37.61))
+        self.assertEqual(AddressCoordinates.objects.count(), 1)
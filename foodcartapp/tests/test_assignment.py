@@ -0,0 +1,176 @@
+import itertools
+from io import StringIO
+from unittest.mock import patch
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from foodcartapp.assignment import (
+    assign_pending_orders,
+    plan_assignment,
+    solve_assignment,
+)
+from foodcartapp.models import (
+    Order,
+    OrderItem,
+    Product,
+    Restaurant,
+    RestaurantMenuItem,
+)
+
+
+class SolveAssignmentTestCase(SimpleTestCase):
+
+    def test_matches_brute_force(self):
+        """Проверка, что найденное назначение минимально по сумме"""
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            rows, columns = map(int, rng.integers(1, 6, 2))
+            cost = rng.random((rows, columns))
+
+            found = cost[solve_assignment(cost)].sum()
+
+            if rows <= columns:
+                pairs = itertools.permutations(range(columns), rows)
+                best = min(cost[range(rows), list(p)].sum() for p in pairs)
+            else:
+                pairs = itertools.permutations(range(rows), columns)
+                best = min(cost[list(p), range(columns)].sum() for p in pairs)
+            self.assertAlmostEqual(found, best)
+
+    def test_hundreds_of_orders(self):
+        """Проверка, что сотни заказов на сотни слотов получают оптимальное назначение"""
+        rng = np.random.default_rng(1)
+        cost = rng.random((300, 500)) * 20 + 1
+        best = rng.permutation(500)[:300]
+        cost[range(300), best] = 0
+
+        rows, columns = solve_assignment(cost)
+
+        self.assertEqual(len(set(columns)), 300)
+        self.assertEqual(cost[rows, columns].sum(), 0)
+        self.assertEqual(list(columns[np.argsort(rows)]), list(best))
+
+
+class AssignPendingOrdersTestCase(TestCase):
+
+    def setUp(self):
+        self.burger = Product.objects.create(name="Бургер", price=200)
+        self.fries = Product.objects.create(name="Картофель", price=100)
+        self.center = Restaurant.objects.create(
+            name="Центр", latitude=55.7539, longitude=37.6208, capacity=1
+        )
+        self.arbat = Restaurant.objects.create(
+            name="Арбат", latitude=55.7520, longitude=37.5870
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for restaurant in (self.center, self.arbat):
+                RestaurantMenuItem.objects.create(
+                    restaurant=restaurant, product=self.burger
+                )
+
+    def create_order(self, latitude, longitude, *products):
+        order = Order.objects.create(
+            firstname="Иван",
+            lastname="Петров",
+            phonenumber="+79048908292",
+            address="Москва, ул. Новый Арбат, 55",
+        )
+        for product in products or [self.burger]:
+            OrderItem.objects.create(
+                order=order, product=product, fixed_price=product.price
+            )
+        Order.objects.filter(pk=order.pk).update(latitude=latitude, longitude=longitude)
+        return order
+
+    def test_respects_capacity_with_minimal_total_distance(self):
+        """Проверка, что занятый ресторан получает заказ, которому он нужнее"""
+        near_center = self.create_order(55.7560, 37.6200)
+        between = self.create_order(55.7530, 37.6050)
+
+        assignments = assign_pending_orders()
+
+        self.assertEqual(len(assignments), 2)
+        near_center.refresh_from_db()
+        between.refresh_from_db()
+        self.assertEqual(near_center.restaurant, self.center)
+        self.assertEqual(between.restaurant, self.arbat)
+
+    def test_counts_active_orders_against_capacity(self):
+        """Проверка, что уже назначенные заказы занимают вместимость"""
+        busy = self.create_order(55.7539, 37.6208)
+        Order.objects.filter(pk=busy.pk).update(
+            restaurant=self.center, status="processing"
+        )
+        order = self.create_order(55.7560, 37.6200)
+
+        assign_pending_orders()
+
+        order.refresh_from_db()
+        self.assertEqual(order.restaurant, self.arbat)
+
+    def test_skips_orders_nobody_can_cook(self):
+        """Проверка, что заказ без подходящего ресторана остаётся свободным"""
+        order = self.create_order(55.7560, 37.6200, self.fries)
+
+        self.assertEqual(assign_pending_orders(), [])
+        order.refresh_from_db()
+        self.assertIsNone(order.restaurant)
+
+    def test_rechecks_capacity_before_saving(self):
+        """Проверка, что место, занятое параллельным назначением, не отдаётся повторно"""
+        order = self.create_order(55.7560, 37.6200)
+        rival = self.create_order(55.7539, 37.6208)
+        RestaurantMenuItem.objects.filter(restaurant=self.arbat).delete()
+
+        def plan_then_lose_race(orders):
+            planned = plan_assignment(orders)
+            Order.objects.filter(pk=rival.pk).update(
+                restaurant=self.center, status="processing"
+            )
+            return planned
+
+        with patch(
+            "foodcartapp.assignment.plan_assignment", side_effect=plan_then_lose_race
+        ):
+            assignments = assign_pending_orders([order])
+
+        self.assertEqual(assignments, [])
+        order.refresh_from_db()
+        self.assertIsNone(order.restaurant)
+
+    def test_skips_orders_assigned_meanwhile(self):
+        """Проверка, что заказ, назначенный после выборки, не переназначается"""
+        order = self.create_order(55.7560, 37.6200)
+        Order.objects.filter(pk=order.pk).update(restaurant=self.arbat)
+
+        self.assertEqual(assign_pending_orders([order]), [])
+        order.refresh_from_db()
+        self.assertEqual(order.restaurant, self.arbat)
+
+    @override_settings(RESTAURANT_SEARCH_RADIUS_KM=5)
+    def test_skips_restaurants_beyond_search_radius(self):
+        """Проверка, что ресторан дальше радиуса поиска не назначается"""
+        order = self.create_order(55.7560, 37.6200)
+        Restaurant.objects.filter(pk=self.center.pk).update(
+            latitude=54.5293, longitude=36.2754
+        )
+        Restaurant.objects.filter(pk=self.arbat.pk).update(
+            latitude=54.5300, longitude=36.2760
+        )
+
+        self.assertEqual(assign_pending_orders(), [])
+        order.refresh_from_db()
+        self.assertIsNone(order.restaurant)
+
+    def test_command_dry_run(self):
+        """Проверка, что команда с --dry-run не сохраняет назначения"""
+        order = self.create_order(55.7560, 37.6200)
+        stdout = StringIO()
+
+        call_command("assign_orders", "--dry-run", stdout=stdout)
+
+        self.assertIn("Назначено 1 из 1", stdout.getvalue())
+        order.refresh_from_db()
+        self.assertIsNone(order.restaurant)
@@ -0,0 +1,107 @@
+from django.test import TestCase
+
+from foodcartapp.models import (
+    Order,
+    OrderItem,
+    Product,
+    Restaurant,
+    RestaurantMenuItem,
+)
+from geocoder.models import AddressCoordinates, coordinates_cache
+
+
+class OrderCandidatesTestCase(TestCase):
+
+    def setUp(self):
+        coordinates_cache.clear()
+        self.address = "Москва, Красная площадь, 1"
+        AddressCoordinates.objects.create(
+            address=self.address, latitude=55.7539, longitude=37.6208
+        )
+        self.burger = Product.objects.create(name="Бургер", price=200)
+        self.near = Restaurant.objects.create(
+            name="Центр", latitude=55.7653, longitude=37.6208
+        )
+        self.far = Restaurant.objects.create(
+            name="Арбат", latitude=55.7520, longitude=37.5870
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for restaurant in (self.near, self.far):
+                RestaurantMenuItem.objects.create(
+                    restaurant=restaurant, product=self.burger
+                )
+
+    def create_order(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/order/",
+                {
+                    "firstname": "Иван",
+                    "lastname": "Петров",
+                    "phonenumber": "+79048908292",
+                    "address": self.address,
+                    "items": [{"product": self.burger.id, "quantity": 1}],
+                },
+                content_type="application/json",
+            )
+        return Order.objects.get(pk=response.json()["id"])
+
+    def test_candidates_are_ranked_at_checkout(self):
+        """Проверка, что кандидаты считаются при оформлении заказа"""
+        order = self.create_order()
+
+        candidates = list(order.candidates.all())
+        self.assertEqual([c.restaurant for c in candidates], [self.near, self.far])
+        self.assertEqual([c.rank for c in candidates], [1, 2])
+        self.assertEqual(candidates[0].distance_km, 1.3)
+
+    def test_candidates_follow_menu_availability(self):
+        """Проверка, что кандидаты пересчитываются при смене доступности меню"""
+        order = self.create_order()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RestaurantMenuItem.objects.filter(restaurant=self.near).update(
+                availability=False
+            )
+            RestaurantMenuItem.objects.get(restaurant=self.near).save()
+
+        self.assertEqual([c.restaurant for c in order.candidates.all()], [self.far])
+
+    def test_candidates_follow_order_items(self):
+        """Проверка, что кандидаты пересчитываются при изменении состава заказа"""
+        order = self.create_order()
+        fries = Product.objects.create(name="Картофель", price=100)
+        with self.captureOnCommitCallbacks(execute=True):
+            RestaurantMenuItem.objects.create(restaurant=self.far, product=fries)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderItem.objects.create(order=order, product=fries, fixed_price=100)
+
+        self.assertEqual([c.restaurant for c in order.candidates.all()], [self.far])
+
+    def test_candidates_follow_restaurant_coordinates(self):
+        """Проверка, что кандидаты пересчитываются при переезде ресторана"""
+        order = self.create_order()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.far.latitude, self.far.longitude = 55.7540, 37.6210
+            self.far.save()
+
+        self.assertEqual(
+            [c.restaurant for c in order.candidates.all()], [self.far, self.near]
+        )
+
+    def test_restaurant_rename_keeps_candidates(self):
+        """Проверка, что правка названия ресторана не пересчитывает кандидатов"""
+        self.create_order()
+        self.near = Restaurant.objects.get(pk=self.near.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.near.name = "Центр на Красной"
+            self.near.save()
+
+        self.assertFalse(
+            any(
+                getattr(callback, "key", None) == "candidates" for callback in callbacks
+            )
+        )
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from geocoder.cache import CoordinatesCache
+from geocoder.models import AddressCoordinates, coordinates_cache
+
+
+class CoordinatesCacheTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = CoordinatesCache(maxsize=2)
+
+    def test_evicts_least_recently_used(self):
+        """Проверка, что вытесняется самый давно запрошенный адрес"""
+        expires_at = timezone.now() + timedelta(days=30)
+        self.cache.set("a", (1.0, 1.0), expires_at)
+        self.cache.set("b", (2.0, 2.0), expires_at)
+        self.cache.get("a")
+        self.cache.set("c", (3.0, 3.0), expires_at)
+
+        self.assertEqual(self.cache.get("a"), (1.0, 1.0))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_expires_after_deadline(self):
+        """Проверка, что просроченная запись не отдаётся"""
+        self.cache.set("a", (1.0, 1.0), timezone.now() - timedelta(seconds=1))
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+
+class AddressCoordinatesLookupTestCase(TestCase):
+
+    def setUp(self):
+        coordinates_cache.clear()
+        self.address = "Москва, Красная площадь, 11"
+        AddressCoordinates.objects.create(
+            address=self.address, latitude=55.75, longitude=37.62
+        )
+
+    def test_repeated_lookup_skips_database(self):
+        """Проверка, что повторный поиск адреса не ходит в БД"""
+        with self.assertNumQueries(0):
+            coords = AddressCoordinates.lookup(self.address)
+
+        self.assertEqual(coords, (55.75, 37.62))
+        self.assertEqual(coordinates_cache.stats()["hits"], 1)
+
+    def test_lookup_of_unknown_address_is_not_cached(self):
+        """Проверка, что адрес без координат не оседает в кэше"""
+        coords = AddressCoordinates.lookup("Калуга, ул. Новый Арбат, 15")
+
+        self.assertEqual(coords, (None, None))
+        self.assertIsNone(coordinates_cache.get("Калуга, ул. Новый Арбат, 15"))
+
+    def test_known_missing_address_is_cached_until_retry(self):
+        """Проверка, что ненайденный адрес кэшируется до следующей попытки"""
+        place = AddressCoordinates(address="Калуга, ул. Новый Арбат, 15")
+        place.apply_result(None)
+        place.save()
+
+        with self.assertNumQueries(0):
+            coords = AddressCoordinates.lookup("Калуга, ул. Новый Арбат, 15")
+
+        self.assertEqual(coords, (None, None))
@@ -0,0 +1,103 @@
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from foodcartapp.models import Order, Restaurant
+from geocoder.models import AddressCoordinates, coordinates_cache
+
+
+class DirtyFieldsTestCase(TestCase):
+
+    def setUp(self):
+        coordinates_cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(
+                firstname="Иван",
+                lastname="Петров",
+                phonenumber="+79048908292",
+                address="Москва, ул. Новый Арбат, 55",
+            )
+        self.order = Order.objects.get()
+
+    def test_has_changed(self):
+        """Проверка, что изменения видны без запроса к базе"""
+        with self.assertNumQueries(0):
+            self.assertFalse(self.order.has_changed("address"))
+            self.order.status = "processing"
+            self.assertTrue(self.order.has_changed("status"))
+            self.assertEqual(self.order.get_dirty_fields(), ["status"])
+
+    def save_and_capture(self, order):
+        with CaptureQueriesContext(connection) as context:
+            with self.captureOnCommitCallbacks(execute=True):
+                order.save()
+        return [query["sql"] for query in context]
+
+    def get_updated_columns(self, queries):
+        return [
+            re.findall(r'"(\w+)" = ', sql.split(" WHERE ")[0])
+            for sql in queries
+            if sql.startswith('UPDATE "foodcartapp_order"')
+        ]
+
+    def test_status_update_is_single_narrow_update(self):
+        """Проверка, что смена статуса — один UPDATE только изменённых полей"""
+        self.order.status = "processing"
+
+        queries = self.save_and_capture(self.order)
+
+        # Смена статуса и публикация в ленту дашборда после фиксации
+        self.assertEqual(
+            self.get_updated_columns(queries),
+            [["status", "updated_at"], ["change_seq"]],
+        )
+        self.assertFalse(any('FROM "foodcartapp_order"' in sql for sql in queries))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "processing")
+        self.assertEqual(self.order.get_dirty_fields(), [])
+
+    def test_deferred_fields_are_not_saved(self):
+        """Проверка, что отложенные поля не догружаются и не попадают в UPDATE"""
+        order = Order.objects.only("id", "status").get()
+        order.status = "processing"
+
+        queries = self.save_and_capture(order)
+
+        self.assertEqual(
+            self.get_updated_columns(queries),
+            [["status", "updated_at"], ["change_seq"]],
+        )
+        self.assertFalse(any('FROM "foodcartapp_order"' in sql for sql in queries))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "processing")
+        self.assertEqual(self.order.address, "Москва, ул. Новый Арбат, 55")
+
+    def test_does_not_overwrite_columns_updated_elsewhere(self):
+        """Проверка, что сохранение не затирает поля, обновлённые в обход модели"""
+        Order.objects.filter(pk=self.order.pk).update(total=500)
+        self.order.comment = "Без лука"
+
+        self.order.save()
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total, 500)
+        self.assertEqual(self.order.comment, "Без лука")
+
+    def test_address_change_still_geocodes(self):
+        """Проверка, что смена адреса подтягивает координаты"""
+        AddressCoordinates.objects.create(
+            address="Москва, Красная площадь, 1", latitude=55.7539, longitude=37.6208
+        )
+        restaurant = Restaurant.objects.create(name="Центр")
+        restaurant = Restaurant.objects.get(pk=restaurant.pk)
+
+        restaurant.address = "Москва, Красная площадь, 1"
+        restaurant.save()
+
+        restaurant.refresh_from_db()
+        self.assertEqual(
+            (restaurant.latitude, restaurant.longitude), (55.7539, 37.6208)
+        )
+        self.assertFalse(restaurant.has_changed("address"))
@@ -0,0 +1,121 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from geopy import distance
+
+from foodcartapp.distances import (
+    distance_matrix,
+    equirectangular_matrix,
+    haversine_matrix,
+    rank_by_distance,
+)
+from foodcartapp.utils import calculate_distance
+
+# В data.json координаты не заполнены, поэтому адреса фикстуры
+# сопоставлены с точками, которые для них возвращает геокодер.
+DATA_COORDINATES = {
+    "Москва, ул. Новый Арбат, 55": (55.752040, 37.587144),
+    "Москва, Красная площадь, 11": (55.753930, 37.620795),
+    "Москва, пл. Киевского Вокзала, 2": (55.744604, 37.565681),
+    "Москва, Цветной бульвар, 11с2": (55.770226, 37.620562),
+    "Калуга, ул. Новый Арбат, 15": (54.529340, 36.275427),
+    "Улица Партизана Железняка, 34а": (56.036610, 92.915798),
+}
+
+
+def place(id, latitude, longitude):
+    return SimpleNamespace(id=id, latitude=latitude, longitude=longitude)
+
+
+class DistanceMatrixTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.orders = [place(1, 55.7558, 37.6173), place(2, 55.7339, 37.5884)]
+        self.restaurants = [
+            place(10, 55.7520, 37.5870),
+            place(11, 55.7653, 37.6208),
+            place(12, 54.5293, 36.2754),
+        ]
+
+    def test_matches_geodesic_at_city_scale(self):
+        """Проверка, что матрица совпадает с геодезическим расстоянием"""
+        matrix = haversine_matrix(
+            [(o.latitude, o.longitude) for o in self.orders],
+            [(r.latitude, r.longitude) for r in self.restaurants],
+        )
+
+        for i, order in enumerate(self.orders):
+            for j, restaurant in enumerate(self.restaurants):
+                expected = distance.distance(
+                    (order.latitude, order.longitude),
+                    (restaurant.latitude, restaurant.longitude),
+                ).km
+                self.assertAlmostEqual(matrix[i, j], expected, delta=expected * 0.005)
+
+    def test_ranks_candidates_by_distance(self):
+        """Проверка, что рестораны отсортированы по расстоянию"""
+        candidates = {1: self.restaurants, 2: self.restaurants[:1]}
+
+        ranked = rank_by_distance(self.orders, candidates)
+
+        self.assertEqual([item["restaurant"].id for item in ranked[1]], [11, 10, 12])
+        self.assertEqual(ranked[1][0]["distance"], round(ranked[1][0]["distance"], 1))
+        self.assertEqual(len(ranked[2]), 1)
+
+    def test_skips_places_without_coordinates(self):
+        """Проверка, что места без координат не участвуют в расчёте"""
+        orders = [place(1, None, None), self.orders[1]]
+        candidates = {1: self.restaurants, 2: [place(13, None, None)]}
+
+        self.assertEqual(rank_by_distance(orders, candidates), {1: [], 2: []})
+
+
+class DistanceModesTestCase(SimpleTestCase):
+
+    def setUp(self):
+        with open(Path(settings.BASE_DIR) / "data_utf8.json", encoding="utf-8") as file:
+            fixture = json.load(file)
+        addresses = {
+            model: [
+                item["fields"]["address"]
+                for item in fixture
+                if item["model"] == f"foodcartapp.{model}"
+            ]
+            for model in ("order", "restaurant")
+        }
+        self.orders = [DATA_COORDINATES[address] for address in addresses["order"]]
+        self.restaurants = [
+            DATA_COORDINATES[address] for address in addresses["restaurant"]
+        ]
+        # Заказ из фикстуры в другом городе, добавляем московские адреса
+        self.orders += self.restaurants
+
+    def test_equirectangular_matches_geodesic_after_rounding(self):
+        """Проверка, что быстрый режим совпадает с геодезическим до 0.1 км на парах из data.json"""
+        matrix = equirectangular_matrix(self.orders, self.restaurants)
+
+        for i, order in enumerate(self.orders):
+            for j, restaurant in enumerate(self.restaurants):
+                expected = distance.distance(order, restaurant).km
+                self.assertEqual(round(matrix[i, j], 1), round(expected, 1))
+
+    def test_calculate_distance_in_every_mode(self):
+        """Проверка, что calculate_distance учитывает настройку DISTANCE_MODE"""
+        point_a, point_b = self.restaurants[0], self.restaurants[3]
+        expected = round(distance.distance(point_a, point_b).km, 1)
+
+        for mode in ("geodesic", "equirectangular"):
+            with override_settings(DISTANCE_MODE=mode):
+                self.assertEqual(calculate_distance(point_a, point_b), expected)
+        with override_settings(DISTANCE_MODE="haversine"):
+            self.assertAlmostEqual(
+                calculate_distance(point_a, point_b), expected, delta=0.1
+            )
+
+    def test_unknown_mode(self):
+        """Проверка, что неизвестный режим расчёта приводит к ошибке"""
+        with self.assertRaises(ValueError):
+            distance_matrix(self.orders, self.restaurants, mode="manhattan")
@@ -0,0 +1,70 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from foodcartapp.models import Restaurant
+from geocoder.models import AddressCoordinates
+
+
+class GeocodeAddressesCommandTestCase(TestCase):
+
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(
+            name="Star Burger Арбат", address="Москва, ул. Новый Арбат, 55"
+        )
+        self.fresh = AddressCoordinates.objects.create(
+            address="Москва, Красная площадь, 11", latitude=55.75, longitude=37.62
+        )
+        Restaurant.objects.create(
+            name="Star Burger Центр", address="Москва, Красная площадь, 11"
+        )
+
+    def run_command(self, **options):
+        call_command("geocode_addresses", rps=0, stdout=StringIO(), **options)
+
+    @patch("foodcartapp.management.commands.geocode_addresses.fetch_coordinates")
+    def test_geocodes_only_missing_addresses(self, mock_fetch):
+        """Проверка, что свежие записи не запрашиваются повторно"""
+        mock_fetch.return_value = (55.75, 37.59)
+
+        self.run_command()
+
+        mock_fetch.assert_called_once_with("Москва, ул. Новый Арбат, 55")
+        row = AddressCoordinates.objects.get(address=self.restaurant.address)
+        self.assertEqual((row.latitude, row.longitude), (55.75, 37.59))
+
+    @patch("foodcartapp.management.commands.geocode_addresses.fetch_coordinates")
+    def test_fills_restaurant_coordinates(self, mock_fetch):
+        """Проверка, что координаты проставляются ресторанам"""
+        mock_fetch.return_value = (55.75, 37.59)
+
+        self.run_command()
+
+        self.restaurant.refresh_from_db()
+        self.assertEqual(
+            (self.restaurant.latitude, self.restaurant.longitude), (55.75, 37.59)
+        )
+        self.assertTrue(
+            Restaurant.objects.filter(latitude=55.75, longitude=37.62).exists()
+        )
+
+    @patch("foodcartapp.management.commands.geocode_addresses.fetch_coordinates")
+    def test_bad_response_does_not_abort_command(self, mock_fetch):
+        """Проверка, что кривой ответ геокодера не теряет остальные результаты"""
+        broken = Restaurant.objects.create(
+            name="Star Burger Тверская", address="Москва, ул. Тверская, 1"
+        )
+        mock_fetch.side_effect = lambda address: (
+            {}["Point"] if address == broken.address else (55.75, 37.59)
+        )
+
+        self.run_command(stderr=StringIO())
+
+        self.restaurant.refresh_from_db()
+        self.assertEqual(
+            (self.restaurant.latitude, self.restaurant.longitude), (55.75, 37.59)
+        )
+        broken.refresh_from_db()
+        self.assertIsNone(broken.latitude)
@@ -19,10 +19,10 @@ class GeocoderUtilsTestCase(TestCase):
             }
         }
 
-    @patch("requests.get")
+    @patch("geocoder.client.GeocoderClient.get_json")
     def test_get_coordinates_saves_to_db(self, mock_get):
         """Проверка, что координаты сохраняются в БД"""
-        mock_get.return_value.json.return_value = self.mock_response
+        mock_get.return_value = self.mock_response
 
         coords = get_coordinates(self.test_address)
 
@@ -37,17 +37,19 @@ class GeocoderUtilsTestCase(TestCase):
             (db_record.latitude, db_record.longitude), (55.753930, 37.620795)
         )
 
-    @patch("requests.get")
+    @patch("geocoder.client.GeocoderClient.get_json")
     def test_get_coordinates_updates_existing_record(self, mock_get):
         """Проверка, что существующая запись обновляется при необходимости"""
         old_record = AddressCoordinates.objects.create(
             address=self.test_address,
             latitude=0.0,
             longitude=0.0,
-            updated_at=timezone.now() - timezone.timedelta(days=31),  # Устарела
+        )
+        AddressCoordinates.objects.update(
+            updated_at=timezone.now() - timezone.timedelta(days=31)  # Устарела
         )
 
-        mock_get.return_value.json.return_value = self.mock_response
+        mock_get.return_value = self.mock_response
 
         coords = get_coordinates(self.test_address)
 
@@ -61,13 +63,43 @@ class GeocoderUtilsTestCase(TestCase):
         self.assertNotEqual(updated_record.latitude, old_record.latitude)
         self.assertNotEqual(updated_record.longitude, old_record.longitude)
 
-    @patch("requests.get")
+    @patch("geocoder.client.GeocoderClient.get_json")
     def test_get_coordinates_invalid_address(self, mock_get):
-        """Проверка, что неверный адрес возвращает None"""
-        mock_get.return_value.json.return_value = {}
+        """Проверка, что неверный адрес возвращает None и запоминается"""
+        mock_get.return_value = {}
 
         coords = get_coordinates("invalid_address_123")
         self.assertIsNone(coords)  # Проверяем, что вернулось None
-        self.assertFalse(
-            AddressCoordinates.objects.filter(address="invalid_address_123").exists()
+        db_record = AddressCoordinates.objects.get(address="invalid_address_123")
+        self.assertEqual(db_record.status, AddressCoordinates.STATUS_NOT_FOUND)
+
+    @patch("geocoder.client.GeocoderClient.get_json")
+    def test_get_coordinates_skips_known_missing_address(self, mock_get):
+        """Проверка, что ненайденный адрес не запрашивается до конца паузы"""
+        mock_get.return_value = {}
+
+        get_coordinates("invalid_address_123")
+        get_coordinates("invalid_address_123")
+
+        mock_get.assert_called_once()
+
+    @patch("geocoder.client.GeocoderClient.get_json")
+    def test_get_coordinates_backs_off_exponentially(self, mock_get):
+        """Проверка, что пауза между повторными поисками растёт"""
+        mock_get.return_value = {}
+        record = AddressCoordinates.objects.create(
+            address="invalid_address_123",
+            status=AddressCoordinates.STATUS_NOT_FOUND,
+            misses=2,
+            retry_after=timezone.now(),
+        )
+
+        get_coordinates("invalid_address_123")
+
+        record.refresh_from_db()
+        self.assertEqual(record.misses, 3)
+        self.assertAlmostEqual(
+            (record.retry_after - record.updated_at).total_seconds(),
+            (AddressCoordinates.NEGATIVE_CACHE_TTL * 4).total_seconds(),
+            delta=1,
         )
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from geocoder.api import get_backend
+from geocoder.backends import OfflineGeocoder, StubGeocoder
+from geocoder.stub import make_stub_server
+
+
+class OfflineGeocoderTestCase(SimpleTestCase):
+
+    def setUp(self):
+        gazetteer = tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", encoding="utf-8", delete=False
+        )
+        gazetteer.write("address,latitude,longitude\n")
+        gazetteer.write('"Москва, Красная площадь, 1",55.753930,37.620795\n')
+        gazetteer.close()
+        self.gazetteer = gazetteer.name
+        self.addCleanup(os.remove, self.gazetteer)
+
+    def test_uses_gazetteer(self):
+        """Проверка, что адрес из справочника находится с точностью до нормализации"""
+        geocoder = OfflineGeocoder(self.gazetteer)
+
+        self.assertEqual(
+            geocoder.geocode("москва красная площадь 1"), (55.753930, 37.620795)
+        )
+
+    def test_unknown_address_is_deterministic(self):
+        """Проверка, что неизвестный адрес всегда получает одну и ту же точку"""
+        first = OfflineGeocoder().geocode("Москва, ул. Новый Арбат, 55")
+        second = OfflineGeocoder().geocode("Москва, улица Новый Арбат, 55")
+
+        self.assertEqual(first, second)
+        self.assertAlmostEqual(first[0], 55.75, delta=0.2)
+
+    def test_strict_mode_misses_unknown_address(self):
+        """Проверка, что в строгом режиме неизвестный адрес не находится"""
+        geocoder = OfflineGeocoder(self.gazetteer, strict=True)
+
+        self.assertIsNone(geocoder.geocode("Калуга, ул. Новый Арбат, 15"))
+
+    def test_loads_cp1251_fixture(self):
+        """Проверка, что фикстура data.json в cp1251 читается, а её адреса находятся"""
+        geocoder = OfflineGeocoder(
+            os.path.join(settings.BASE_DIR, "data.json"), strict=True
+        )
+
+        self.assertIsNotNone(geocoder.geocode("Улица Партизана Железняка, 34а"))
+
+    def test_backend_follows_settings(self):
+        """Проверка, что смена GEOCODER_BACKEND сбрасывает закэшированный бэкенд"""
+        with override_settings(GEOCODER_BACKEND="geocoder.backends.OfflineGeocoder"):
+            self.assertIsInstance(get_backend(), OfflineGeocoder)
+            with override_settings(GEOCODER_BACKEND="geocoder.backends.StubGeocoder"):
+                self.assertIsInstance(get_backend(), StubGeocoder)
+            self.assertNotIsInstance(get_backend(), StubGeocoder)
+
+
+class StubGeocoderTestCase(SimpleTestCase):
+
+    def test_round_trip_through_stub_server(self):
+        """Проверка, что заглушка отвечает в формате Яндекса"""
+        offline = OfflineGeocoder()
+        server = make_stub_server(offline, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        host, port = server.server_address
+        geocoder = StubGeocoder(f"http://{host}:{port}/1.x/")
+        address = "Москва, Цветной бульвар, 11с2"
+
+        self.assertEqual(geocoder.geocode(address), offline.geocode(address))
+        self.assertEqual(geocoder.stats()["calls"], 1)
@@ -0,0 +1,93 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.test import SimpleTestCase
+
+from geocoder.client import CircuitBreaker, GeocoderClient, GeocoderUnavailable
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.client_ports.add(self.client_address[1])
+        status = server.statuses.pop(0) if server.statuses else 200
+        body = json.dumps({"ok": True}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GeocoderClientTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.statuses = []
+        self.server.client_ports = set()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        host, port = self.server.server_address
+        self.client = GeocoderClient(
+            f"http://{host}:{port}/1.x/",
+            backoff=0,
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        )
+        self.addCleanup(self.client.close)
+
+    def test_reuses_connection(self):
+        """Проверка, что запросы идут через одно keep-alive соединение"""
+        for _ in range(3):
+            self.assertEqual(self.client.get_json({}), {"ok": True})
+
+        self.assertEqual(len(self.server.client_ports), 1)
+        self.assertEqual(self.client.stats.snapshot()["calls"], 3)
+
+    def test_retries_server_errors(self):
+        """Проверка, что ошибки сервера повторяются"""
+        self.server.statuses = [503, 502]
+
+        self.assertEqual(self.client.get_json({}), {"ok": True})
+        self.assertEqual(self.client.stats.snapshot()["errors"], 2)
+
+    def test_does_not_retry_client_errors(self):
+        """Проверка, что ошибки клиента не повторяются"""
+        self.server.statuses = [403]
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.client.get_json({})
+        self.assertEqual(self.client.stats.snapshot()["calls"], 1)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        """Проверка, что после серии ошибок запросы не отправляются"""
+        self.server.statuses = [500] * 6
+
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.client.get_json({})
+        with self.assertRaises(GeocoderUnavailable):
+            self.client.get_json({})
+
+        self.assertTrue(self.client.breaker.is_open)
+        self.assertEqual(self.client.stats.snapshot()["calls"], 6)
+
+    def test_client_errors_do_not_open_circuit(self):
+        """Проверка, что отклонённые геокодером запросы не размыкают цепь"""
+        self.server.statuses = [400, 404, 400]
+
+        for _ in range(3):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.client.get_json({})
+
+        self.assertFalse(self.client.breaker.is_open)
+        self.assertEqual(self.client.get_json({}), {"ok": True})
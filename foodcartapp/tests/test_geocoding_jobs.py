@@ -0,0 +1,201 @@
+from io import StringIO
+from unittest.mock import patch
+
+import requests
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from foodcartapp.management.commands.process_geocoding_jobs import Command
+from foodcartapp.models import Order
+from geocoder.models import AddressCoordinates, GeocodingJob, coordinates_cache
+from geocoder.throttling import RateLimiter
+
+
+class GeocodingJobsTestCase(TestCase):
+
+    def setUp(self):
+        coordinates_cache.clear()
+        self.address = "Москва, ул. Новый Арбат, 55"
+
+    def create_order(self):
+        return Order.objects.create(
+            firstname="Иван",
+            lastname="Петров",
+            phonenumber="+79048908292",
+            address=self.address,
+        )
+
+    def run_worker(self):
+        call_command("process_geocoding_jobs", once=True, rps=0, stdout=StringIO())
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_order_is_saved_without_calling_geocoder(self, mock_fetch):
+        """Проверка, что заказ сохраняется без обращения к геокодеру"""
+        order = self.create_order()
+
+        mock_fetch.assert_not_called()
+        self.assertIsNone(order.latitude)
+        self.assertTrue(GeocodingJob.objects.filter(address=self.address).exists())
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_worker_fills_order_coordinates(self, mock_fetch):
+        """Проверка, что обработчик очереди проставляет координаты заказу"""
+        mock_fetch.return_value = (55.75, 37.59)
+        order = self.create_order()
+
+        self.run_worker()
+
+        order.refresh_from_db()
+        self.assertEqual((order.latitude, order.longitude), (55.75, 37.59))
+        self.assertFalse(GeocodingJob.objects.exists())
+        self.assertTrue(AddressCoordinates.objects.for_address(self.address).exists())
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_failed_job_is_postponed(self, mock_fetch):
+        """Проверка, что задача с ошибкой откладывается на потом"""
+        mock_fetch.side_effect = requests.exceptions.ConnectionError("timeout")
+        order = self.create_order()
+
+        self.run_worker()
+
+        job = GeocodingJob.objects.get()
+        self.assertEqual(job.attempts, 1)
+        self.assertFalse(GeocodingJob.due().exists())
+        order.refresh_from_db()
+        self.assertIsNone(order.latitude)
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_new_order_revives_exhausted_job(self, mock_fetch):
+        """Проверка, что новый заказ оживляет задачу, исчерпавшую попытки"""
+        self.create_order()
+        GeocodingJob.objects.update(
+            attempts=GeocodingJob.MAX_ATTEMPTS, last_error="timeout"
+        )
+        self.assertFalse(GeocodingJob.due().exists())
+        mock_fetch.return_value = (55.75, 37.59)
+
+        order = self.create_order()
+        job = GeocodingJob.objects.get()
+        self.assertEqual((job.attempts, job.last_error), (0, ""))
+        self.run_worker()
+
+        order.refresh_from_db()
+        self.assertEqual((order.latitude, order.longitude), (55.75, 37.59))
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_bad_response_does_not_abort_batch(self, mock_fetch):
+        """Проверка, что кривой ответ геокодера откладывает только свою задачу"""
+        other_address = "Москва, ул. Тверская, 1"
+        mock_fetch.side_effect = lambda address: (
+            (55.76, 37.61) if address == other_address else {}["response"]
+        )
+        self.create_order()
+        other = Order.objects.create(
+            firstname="Анна",
+            lastname="Сидорова",
+            phonenumber="+79048908293",
+            address=other_address,
+        )
+
+        self.run_worker()
+
+        job = GeocodingJob.objects.get()
+        self.assertEqual((job.address, job.attempts), (self.address, 1))
+        other.refresh_from_db()
+        self.assertEqual((other.latitude, other.longitude), (55.76, 37.61))
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_geocoding_runs_outside_transaction(self, mock_fetch):
+        """Проверка, что геокодер вызывается без открытой транзакции, а задача взята"""
+        depth = len(connection.atomic_blocks)
+        seen = []
+
+        def fetch(address):
+            seen.append((len(connection.atomic_blocks), GeocodingJob.due().exists()))
+            return (55.75, 37.59)
+
+        mock_fetch.side_effect = fetch
+        self.create_order()
+
+        self.run_worker()
+
+        self.assertEqual(seen, [(depth, False)])
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_worker_fills_address_variants(self, mock_fetch):
+        """Проверка, что координаты получают заказы с тем же адресом в другом написании"""
+        mock_fetch.return_value = (55.75, 37.59)
+        order = self.create_order()
+        variant = Order.objects.create(
+            firstname="Анна",
+            lastname="Сидорова",
+            phonenumber="+79048908293",
+            address="москва, улица новый арбат 55",
+        )
+
+        self.run_worker()
+
+        mock_fetch.assert_called_once()
+        for obj in (order, variant):
+            obj.refresh_from_db()
+            self.assertEqual((obj.latitude, obj.longitude), (55.75, 37.59))
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_not_found_address_is_reported(self, mock_fetch):
+        """Проверка, что ненайденный адрес не висит в статусе «уточняются»"""
+        mock_fetch.return_value = None
+        order = self.create_order()
+        completed = self.create_order()
+        Order.objects.filter(pk=completed.pk).update(status="completed")
+        completed.refresh_from_db()
+
+        self.run_worker()
+
+        self.assertFalse(GeocodingJob.objects.exists())
+        order = Order.objects.with_address_status().get(pk=order.pk)
+        self.assertIsNone(order.latitude)
+        self.assertTrue(order.address_not_found)
+        self.assertEqual(
+            Order.objects.get(pk=completed.pk).updated_at, completed.updated_at
+        )
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_job_requested_again_during_geocoding_is_kept(self, mock_fetch):
+        """Проверка, что задача, запрошенная заново во время геокодирования, не удаляется"""
+
+        def fetch(address):
+            GeocodingJob.enqueue(address)
+            return (55.75, 37.59)
+
+        mock_fetch.side_effect = fetch
+        self.create_order()
+
+        Command().process_batch(50, RateLimiter(0))
+
+        self.assertTrue(GeocodingJob.due().exists())
+        self.run_worker()
+        self.assertFalse(GeocodingJob.objects.exists())
+        mock_fetch.assert_called_once()
+
+    def test_admin_resets_exhausted_jobs(self):
+        """Проверка, что в админке можно перезапустить исчерпавшую попытки задачу"""
+        admin = User.objects.create_superuser("admin", password="pass")
+        self.client.force_login(admin)
+        self.create_order()
+        job = GeocodingJob.objects.get()
+        GeocodingJob.objects.update(
+            attempts=GeocodingJob.MAX_ATTEMPTS, last_error="timeout"
+        )
+
+        response = self.client.post(
+            reverse("admin:geocoder_geocodingjob_changelist"),
+            {"action": "reset_attempts", "_selected_action": [job.pk]},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        job.refresh_from_db()
+        self.assertEqual((job.attempts, job.last_error), (0, ""))
+        self.assertTrue(GeocodingJob.due().exists())
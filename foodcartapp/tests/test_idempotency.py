@@ -0,0 +1,139 @@
+import hashlib
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from foodcartapp.models import IdempotencyKey, Order, Product
+
+
+class IdempotencyKeyTestCase(TestCase):
+
+    def setUp(self):
+        self.burger = Product.objects.create(name="Бургер", price=200)
+        self.payload = {
+            "firstname": "Иван",
+            "lastname": "Петров",
+            "phonenumber": "+79048908292",
+            "address": "Москва, ул. Новый Арбат, 55",
+            "items": [{"product": self.burger.id, "quantity": 1}],
+        }
+
+    def fingerprint(self):
+        return hashlib.sha256(
+            json.dumps(self.payload, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def post(self, payload, key="retry-1"):
+        return self.client.post(
+            "/api/order/",
+            payload,
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_returns_stored_response(self):
+        """Проверка, что повтор с тем же ключом не создаёт второй заказ"""
+        first = self.post(self.payload)
+        with patch("foodcartapp.views.OrderCreateView.create_order") as create_order:
+            second = self.post(self.payload)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        create_order.assert_not_called()
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_validation_errors_are_replayed(self):
+        """Проверка, что ошибка валидации тоже сохраняется за ключом"""
+        payload = dict(self.payload, items=[])
+
+        first = self.post(payload)
+        second = self.post(payload)
+
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(second.json(), first.json())
+
+    def test_key_reused_with_other_body(self):
+        """Проверка, что ключ нельзя использовать для другого заказа"""
+        self.post(self.payload)
+
+        response = self.post(dict(self.payload, firstname="Пётр"))
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_duplicate_waits_for_first_request(self):
+        """Проверка, что параллельный дубль дожидается ответа первого запроса"""
+        first = self.post(self.payload, key="in-flight")
+        record = IdempotencyKey.objects.get(key="in-flight")
+        stored = (record.status_code, record.response)
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            status_code=None, response=None
+        )
+
+        def finish_first_request(seconds):
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status_code=stored[0], response=stored[1]
+            )
+
+        with patch("foodcartapp.models.time.sleep", side_effect=finish_first_request):
+            response = self.post(self.payload, key="in-flight")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_expired_key_can_be_reused(self):
+        """Проверка, что после TTL ключ обрабатывается заново"""
+        self.post(self.payload)
+        IdempotencyKey.objects.update(
+            created_at=IdempotencyKey.objects.get().created_at - IdempotencyKey.TTL * 2
+        )
+
+        response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_abandoned_request_is_taken_over(self):
+        """Проверка, что ключ упавшего владельца перехватывается после аренды"""
+        IdempotencyKey.objects.create(
+            key="crashed",
+            fingerprint=self.fingerprint(),
+            claimed_at=timezone.now() - IdempotencyKey.LEASE * 2,
+        )
+
+        response = self.post(self.payload, key="crashed")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+    def test_request_within_lease_is_not_taken_over(self):
+        """Проверка, что ключ, который ещё обрабатывается, не перехватывается"""
+        IdempotencyKey.objects.create(key="busy", fingerprint=self.fingerprint())
+
+        with patch("foodcartapp.models.IdempotencyKey.WAIT_TIMEOUT", 0):
+            response = self.post(self.payload, key="busy")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+
+    def test_purge_command_removes_expired_keys(self):
+        """Проверка, что команда удаляет только просроченные ключи"""
+        self.post(self.payload, key="old")
+        self.post(self.payload, key="fresh")
+        IdempotencyKey.objects.filter(key="old").update(
+            created_at=timezone.now() - IdempotencyKey.TTL * 2
+        )
+
+        call_command("purge_idempotency_keys", stdout=StringIO())
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["fresh"]
+        )
@@ -0,0 +1,219 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from foodcartapp.changes import publish_order_changes
+from foodcartapp.models import Order, Restaurant
+from geocoder.models import AddressCoordinates, coordinates_cache
+from restaurateur.pagination import decode_cursor, paginate_by_keyset
+
+
+class ManagerOrdersPageTestCase(TestCase):
+
+    def setUp(self):
+        manager = User.objects.create_user("manager", password="pass", is_staff=True)
+        self.client.force_login(manager)
+        self.url = reverse("restaurateur:view_orders")
+        self.restaurant = Restaurant.objects.create(name="Центр")
+
+    def create_order(self, **fields):
+        order = Order.objects.create(
+            firstname="Иван",
+            lastname="Петров",
+            phonenumber="+79048908292",
+            address="Москва, ул. Новый Арбат, 55",
+        )
+        if fields:
+            Order.objects.filter(pk=order.pk).update(**fields)
+        return order
+
+    def test_keyset_pages_cover_all_orders_once(self):
+        """Проверка, что страницы по курсору не теряют и не повторяют заказы"""
+        now = timezone.now()
+        orders = [self.create_order(created_at=now) for _ in range(5)]
+        orders += [
+            self.create_order(created_at=now - timedelta(minutes=1)) for _ in range(2)
+        ]
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginate_by_keyset(Order.objects.all(), cursor, page_size=3)
+            seen += [order.id for order in page]
+            if cursor is None:
+                break
+
+        expected = [o.id for o in orders[4::-1]] + [o.id for o in orders[:4:-1]]
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_opens_first_page(self):
+        """Проверка, что испорченный курсор не ломает страницу"""
+        self.assertIsNone(decode_cursor("не курсор"))
+        order = self.create_order()
+
+        response = self.client.get(self.url, {"after": "мусор"})
+
+        self.assertEqual(list(response.context["orders"]), [order])
+
+    def test_filters(self):
+        """Проверка фильтров по статусу, оплате и ресторану"""
+        assigned = self.create_order(
+            restaurant=self.restaurant, status="processing", payment_method="electronic"
+        )
+        free = self.create_order()
+        self.create_order(status="completed")
+
+        def filtered(**params):
+            response = self.client.get(self.url, params)
+            return [order.id for order in response.context["orders"]]
+
+        self.assertEqual(filtered(), [free.id, assigned.id])
+        self.assertEqual(filtered(status="processing"), [assigned.id])
+        self.assertEqual(filtered(payment_method="cash"), [free.id])
+        self.assertEqual(filtered(restaurant=self.restaurant.id), [assigned.id])
+        self.assertEqual(filtered(restaurant="none"), [free.id])
+
+    def test_next_page_link_keeps_filters(self):
+        """Проверка, что ссылка на следующую страницу сохраняет фильтры"""
+        for _ in range(51):
+            self.create_order()
+
+        response = self.client.get(self.url, {"status": "new"})
+
+        self.assertEqual(len(response.context["orders"]), 50)
+        self.assertIn("status=new", response.context["next_query"])
+        self.assertIn("after=", response.context["next_query"])
+
+    def test_shows_address_not_found(self):
+        """Проверка, что заказ с ненайденным адресом помечен отдельно"""
+        coordinates_cache.clear()
+        AddressCoordinates.objects.create(
+            address="Москва, ул. Тверская, 1",
+            status=AddressCoordinates.STATUS_NOT_FOUND,
+            retry_after=timezone.now() + timedelta(hours=1),
+        )
+        self.create_order()
+        Order.objects.create(
+            firstname="Анна",
+            lastname="Сидорова",
+            phonenumber="+79048908293",
+            address="Москва, ул. Тверская, 1",
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertContains(response, "Адрес не найден", count=1)
+        self.assertContains(response, "Координаты уточняются", count=1)
+
+
+class ManagerOrdersFeedTestCase(TestCase):
+
+    def setUp(self):
+        manager = User.objects.create_user("manager", password="pass", is_staff=True)
+        self.client.force_login(manager)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.completed = self.create_order()
+            self.changed = self.create_order()
+            self.untouched = self.create_order()
+        self.cursor = self.client.get(reverse("restaurateur:view_orders")).context[
+            "feed_cursor"
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.completed.status = "completed"
+            self.completed.save()
+            self.changed.comment = "Позвонить заранее"
+            self.changed.save()
+            self.created = self.create_order()
+
+    def create_order(self):
+        return Order.objects.create(
+            firstname="Иван",
+            lastname="Петров",
+            phonenumber="+79048908292",
+            address="Москва, ул. Новый Арбат, 55",
+        )
+
+    def test_feed_returns_only_changes(self):
+        """Проверка, что лента отдаёт только изменённые после курсора заказы"""
+        response = self.client.get(
+            reverse("restaurateur:orders_feed"), {"since": self.cursor}
+        )
+
+        payload = response.json()
+        orders = {order["id"]: order for order in payload["orders"]}
+        self.assertEqual(
+            set(orders), {self.completed.id, self.changed.id, self.created.id}
+        )
+        self.assertFalse(orders[self.completed.id]["visible"])
+        self.assertIn("Позвонить заранее", orders[self.changed.id]["html"])
+        self.assertIn(f'id="order-{self.created.id}"', orders[self.created.id]["html"])
+
+        response = self.client.get(
+            reverse("restaurateur:orders_feed"), {"since": payload["cursor"]}
+        )
+        self.assertEqual(response.json()["orders"], [])
+
+    def test_feed_applies_dashboard_filters(self):
+        """Проверка, что заказ вне фильтра помечается как скрытый"""
+        response = self.client.get(
+            reverse("restaurateur:orders_feed"),
+            {"since": self.cursor, "payment_method": "electronic"},
+        )
+
+        self.assertFalse(any(order["visible"] for order in response.json()["orders"]))
+
+    def test_feed_follows_commit_order_not_timestamps(self):
+        """Проверка, что изменение из долгой транзакции не теряется за курсором"""
+        cursor = self.client.get(
+            reverse("restaurateur:orders_feed"), {"since": self.cursor}
+        ).json()["cursor"]
+        long_ago = timezone.now() - timedelta(minutes=10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.untouched.comment = "Сохранено долгой транзакцией"
+            self.untouched.save()
+            Order.objects.filter(pk=self.untouched.pk).update(updated_at=long_ago)
+
+        response = self.client.get(
+            reverse("restaurateur:orders_feed"), {"since": cursor}
+        )
+
+        self.assertEqual(
+            [order["id"] for order in response.json()["orders"]], [self.untouched.id]
+        )
+
+    def test_feed_rows_return_to_filtered_dashboard(self):
+        """Проверка, что ссылки в строках ленты сохраняют фильтры дашборда"""
+        response = self.client.get(
+            reverse("restaurateur:orders_feed"),
+            {"since": self.cursor, "status": "new"},
+        )
+
+        html = response.json()["orders"][-1]["html"]
+        self.assertIn("next=/manager/orders/%3Fstatus%3Dnew", html)
+
+    def test_order_published_while_page_loads_reaches_feed(self):
+        """Проверка, что заказ, опубликованный во время загрузки страницы, придёт в ленте"""
+
+        def paginate_then_publish(*args, **kwargs):
+            page = paginate_by_keyset(*args, **kwargs)
+            publish_order_changes([self.untouched.id])
+            return page
+
+        with patch(
+            "restaurateur.views.paginate_by_keyset", side_effect=paginate_then_publish
+        ):
+            cursor = self.client.get(
+                reverse("restaurateur:view_orders"), {"payment_method": "electronic"}
+            ).context["feed_cursor"]
+
+        response = self.client.get(
+            reverse("restaurateur:orders_feed"), {"since": cursor}
+        )
+        self.assertIn(
+            self.untouched.id, [order["id"] for order in response.json()["orders"]]
+        )
@@ -0,0 +1,163 @@
+from unittest.mock import patch
+
+from django.db import transaction
+from django.test import TestCase
+
+from foodcartapp.menu import get_capable_restaurants
+from foodcartapp.menu_index import get_menu_index_version, menu_index
+from foodcartapp.models import (
+    Order,
+    OrderItem,
+    Product,
+    Restaurant,
+    RestaurantMenuItem,
+)
+
+
+class CapableRestaurantsTestCase(TestCase):
+
+    def setUp(self):
+        self.burger = Product.objects.create(name="Бургер", price=200)
+        self.fries = Product.objects.create(name="Картофель", price=100)
+        self.arbat = Restaurant.objects.create(name="Арбат")
+        self.center = Restaurant.objects.create(name="Центр")
+        with self.captureOnCommitCallbacks(execute=True):
+            RestaurantMenuItem.objects.create(
+                restaurant=self.arbat, product=self.burger
+            )
+            RestaurantMenuItem.objects.create(restaurant=self.arbat, product=self.fries)
+            RestaurantMenuItem.objects.create(
+                restaurant=self.center, product=self.burger
+            )
+            RestaurantMenuItem.objects.create(
+                restaurant=self.center, product=self.fries, availability=False
+            )
+
+    def create_order(self, *products):
+        order = Order.objects.create(
+            firstname="Иван",
+            lastname="Петров",
+            phonenumber="+79048908292",
+            address="Москва, ул. Новый Арбат, 55",
+        )
+        for product in products:
+            OrderItem.objects.create(
+                order=order, product=product, fixed_price=product.price
+            )
+        return order
+
+    def test_matches_per_order_query(self):
+        """Проверка, что пакетный расчёт совпадает с расчётом по одному заказу"""
+        orders = [
+            self.create_order(self.burger),
+            self.create_order(self.burger, self.fries),
+            self.create_order(),
+        ]
+
+        capable = get_capable_restaurants(orders)
+
+        for order in orders:
+            self.assertEqual(
+                capable[order.id],
+                list(order.get_available_restaurants().order_by("id")),
+            )
+        self.assertEqual(capable[orders[1].id], [self.arbat])
+
+    def test_query_count_does_not_depend_on_orders(self):
+        """Проверка, что число запросов не растёт с числом заказов"""
+        orders = [self.create_order(self.burger, self.fries) for _ in range(10)]
+        menu_index.ensure_fresh()
+
+        with self.assertNumQueries(2):
+            get_capable_restaurants(orders)
+
+
+class MenuIndexTestCase(TestCase):
+
+    def setUp(self):
+        self.burger = Product.objects.create(name="Бургер", price=200)
+        self.fries = Product.objects.create(name="Картофель", price=100)
+        self.arbat = Restaurant.objects.create(name="Арбат")
+        self.center = Restaurant.objects.create(name="Центр")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item = RestaurantMenuItem.objects.create(
+                restaurant=self.arbat, product=self.burger
+            )
+            RestaurantMenuItem.objects.create(
+                restaurant=self.center, product=self.burger
+            )
+            RestaurantMenuItem.objects.create(
+                restaurant=self.center, product=self.fries
+            )
+
+    def test_capable_restaurants(self):
+        """Проверка, что рестораны находятся пересечением битовых карт"""
+        self.assertEqual(
+            sorted(menu_index.capable_restaurant_ids({self.burger.id})),
+            [self.arbat.id, self.center.id],
+        )
+        self.assertEqual(
+            menu_index.capable_restaurant_ids({self.burger.id, self.fries.id}),
+            [self.center.id],
+        )
+        self.assertEqual(menu_index.capable_restaurant_ids(set()), [])
+
+    def test_repeated_checks_skip_database(self):
+        """Проверка, что повторные проверки не обращаются к БД"""
+        menu_index.ensure_fresh()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(menu_index.is_available(self.fries.id, self.center.id))
+            self.assertFalse(menu_index.is_available(self.fries.id, self.arbat.id))
+
+    def test_snapshot_checks_version_once(self):
+        """Проверка, что срез индекса сверяет версию с кэшем один раз"""
+        with patch(
+            "foodcartapp.menu_index.get_menu_index_version",
+            wraps=get_menu_index_version,
+        ) as get_version:
+            menu = menu_index.snapshot()
+            for product in (self.burger, self.fries):
+                for restaurant in (self.center, self.arbat):
+                    menu.is_available(product.id, restaurant.id)
+            menu.capable_restaurant_ids({self.burger.id})
+
+        get_version.assert_called_once()
+
+    def test_invalidated_by_menu_change(self):
+        """Проверка, что индекс сбрасывается при изменении меню"""
+        self.assertTrue(menu_index.is_available(self.burger.id, self.arbat.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.availability = False
+            self.item.save()
+
+        self.assertFalse(menu_index.is_available(self.burger.id, self.arbat.id))
+        self.assertEqual(set(Product.objects.available()), {self.burger, self.fries})
+
+    def test_rolled_back_menu_change_is_not_indexed(self):
+        """Проверка, что откаченное изменение меню не попадает в индекс"""
+        self.assertEqual(
+            menu_index.capable_restaurant_ids({self.fries.id}), [self.center.id]
+        )
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                RestaurantMenuItem.objects.create(
+                    restaurant=self.arbat, product=self.fries
+                )
+                menu_index.capable_restaurant_ids({self.fries.id})
+                raise RuntimeError
+
+        self.assertEqual(
+            menu_index.capable_restaurant_ids({self.fries.id}), [self.center.id]
+        )
+
+    def test_rebuilt_after_max_age(self):
+        """Проверка, что индекс перестраивается по возрасту без смены версии"""
+        menu_index.ensure_fresh()
+        RestaurantMenuItem.objects.filter(pk=self.item.pk).update(availability=False)
+
+        self.assertTrue(menu_index.is_available(self.burger.id, self.arbat.id))
+        with patch.object(menu_index, "max_age", 0):
+            self.assertFalse(menu_index.is_available(self.burger.id, self.arbat.id))
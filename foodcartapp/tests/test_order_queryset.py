@@ -0,0 +1,233 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from foodcartapp.models import Order, OrderItem, Product
+
+
+class OrderQuerySetTestCase(TestCase):
+
+    def setUp(self):
+        self.burger = Product.objects.create(name="Бургер", price=200)
+        self.fries = Product.objects.create(name="Картофель", price=100)
+
+    def create_order(self, *items, status="new"):
+        order = Order.objects.create(
+            firstname="Иван",
+            lastname="Петров",
+            phonenumber="+79048908292",
+            address="Москва, ул. Новый Арбат, 55",
+            status=status,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for product, quantity in items:
+                OrderItem.objects.create(
+                    order=order,
+                    product=product,
+                    quantity=quantity,
+                    fixed_price=product.price,
+                )
+        return order
+
+    def test_annotations(self):
+        """Проверка, что сумма и число позиций считаются подзапросами"""
+        order = self.create_order((self.burger, 2), (self.fries, 1))
+        empty = self.create_order()
+
+        orders = Order.objects.with_totals().with_item_count().in_bulk()
+
+        self.assertEqual(orders[order.id].items_total, Decimal("500"))
+        self.assertEqual(orders[order.id].items_count, 2)
+        self.assertEqual(orders[empty.id].items_total, 0)
+        self.assertEqual(orders[empty.id].items_count, 0)
+
+    def test_total_price_uses_annotation(self):
+        """Проверка, что total_price не делает запрос при наличии аннотации"""
+        self.create_order((self.burger, 3))
+        order = Order.objects.with_totals().get()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(order.total_price(), Decimal("600"))
+
+    def test_open(self):
+        """Проверка, что завершённые заказы не попадают в открытые"""
+        order = self.create_order()
+        self.create_order(status="completed")
+
+        self.assertEqual(list(Order.objects.open()), [order])
+
+    def test_dashboard_queries_do_not_grow_with_orders(self):
+        """Проверка, что страница заказов делает постоянное число запросов"""
+        manager = User.objects.create_user("manager", password="pass", is_staff=True)
+        self.client.force_login(manager)
+        url = reverse("restaurateur:view_orders")
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(context)
+
+        self.create_order((self.burger, 1))
+        few = count_queries()
+        for _ in range(5):
+            self.create_order((self.burger, 2), (self.fries, 1))
+
+        self.assertEqual(count_queries(), few)
+        self.assertContains(self.client.get(url), '"order-price">500', count=5)
+
+
+class OrderTotalTestCase(TestCase):
+
+    def setUp(self):
+        self.burger = Product.objects.create(name="Бургер", price=200)
+        self.order = Order.objects.create(
+            firstname="Иван",
+            lastname="Петров",
+            phonenumber="+79048908292",
+            address="Москва, ул. Новый Арбат, 55",
+        )
+
+    def test_total_is_recomputed_once_per_transaction(self):
+        """Проверка, что сумма заказа пересчитывается одним запросом после коммита"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for quantity in (1, 2, 3):
+                    OrderItem.objects.create(
+                        order=self.order,
+                        product=self.burger,
+                        quantity=quantity,
+                        fixed_price=200,
+                    )
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total, 0)
+
+        with CaptureQueriesContext(connection) as context:
+            for callback in callbacks:
+                callback()
+
+        updates = [
+            query["sql"]
+            for query in context
+            if query["sql"].startswith('UPDATE "foodcartapp_order" SET "total"')
+        ]
+        self.assertEqual(len(updates), 1)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total, Decimal("1200"))
+
+    def test_rolled_back_items_do_not_leak_into_next_commit(self):
+        """Проверка, что заказы из отменённого блока не пересчитываются позже"""
+        other = Order.objects.create(
+            firstname="Анна",
+            lastname="Сидорова",
+            phonenumber="+79048908293",
+            address="Москва, ул. Тверская, 1",
+        )
+        try:
+            with transaction.atomic():
+                OrderItem.objects.create(
+                    order=other, product=self.burger, fixed_price=200
+                )
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        OrderItem.objects.create(order=self.order, product=self.burger, fixed_price=200)
+
+        pending = {}
+        for _, callback, _ in connection.run_on_commit:
+            pending.setdefault(getattr(callback, "key", None), set()).update(
+                getattr(callback, "ids", ())
+            )
+        self.assertIn(self.order.id, pending["totals"])
+        self.assertNotIn(other.id, pending["totals"])
+
+    def test_update_totals_marks_orders_changed(self):
+        """Проверка, что пересчёт суммы сдвигает дату изменения заказа"""
+        updated_at = self.order.updated_at
+        OrderItem.objects.bulk_create(
+            [OrderItem(order=self.order, product=self.burger, fixed_price=200)]
+        )
+
+        Order.objects.filter(pk=self.order.pk).update_totals()
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total, Decimal("200"))
+        self.assertGreater(self.order.updated_at, updated_at)
+
+    def test_update_totals_publishes_after_update(self):
+        """Проверка, что изменение публикуется в ленту уже с новой суммой"""
+        OrderItem.objects.bulk_create(
+            [OrderItem(order=self.order, product=self.burger, fixed_price=200)]
+        )
+        published = []
+
+        def publish(order_ids):
+            published.extend(
+                Order.objects.filter(pk__in=order_ids).values_list("total", flat=True)
+            )
+
+        with patch("foodcartapp.changes.schedule_changes_publish", side_effect=publish):
+            Order.objects.filter(pk=self.order.pk).update_totals()
+
+        self.assertEqual(published, [Decimal("200")])
+
+    def test_total_follows_deleted_items(self):
+        """Проверка, что сумма уменьшается при удалении позиции"""
+        with self.captureOnCommitCallbacks(execute=True):
+            item = OrderItem.objects.create(
+                order=self.order, product=self.burger, fixed_price=200
+            )
+            OrderItem.objects.create(
+                order=self.order, product=self.burger, fixed_price=50
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total, Decimal("50"))
+        self.assertEqual(list(Order.objects.order_by("-total")), [self.order])
+
+    def test_admin_inline_save_recomputes_total_once(self):
+        """Проверка, что сохранение заказа с позициями в админке пересчитывает сумму один раз"""
+        admin = User.objects.create_superuser("admin", password="pass")
+        self.client.force_login(admin)
+        data = {
+            "firstname": self.order.firstname,
+            "lastname": self.order.lastname,
+            "phonenumber": "+79048908292",
+            "address": self.order.address,
+            "status": "new",
+            "payment_method": "cash",
+            "comment": "",
+            "items-TOTAL_FORMS": "10",
+            "items-INITIAL_FORMS": "0",
+            "items-MIN_NUM_FORMS": "0",
+            "items-MAX_NUM_FORMS": "1000",
+        }
+        for i in range(10):
+            data[f"items-{i}-product"] = self.burger.id
+            data[f"items-{i}-quantity"] = 1
+            data[f"items-{i}-fixed_price"] = "200"
+
+        with CaptureQueriesContext(connection) as context:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("admin:foodcartapp_order_change", args=[self.order.id]),
+                    data,
+                )
+
+        self.assertEqual(response.status_code, 302)
+        updates = [
+            query["sql"]
+            for query in context
+            if query["sql"].startswith('UPDATE "foodcartapp_order" SET "total"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total, Decimal("2000"))
@@ -0,0 +1,169 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from foodcartapp.models import Order, Product
+
+
+class OrderCheckoutTestCase(TestCase):
+
+    def setUp(self):
+        self.products = [
+            Product.objects.create(name=f"Бургер {i}", price=100 + i) for i in range(15)
+        ]
+
+    def checkout(self, items):
+        return self.client.post(
+            "/api/order/",
+            {
+                "firstname": "Иван",
+                "lastname": "Петров",
+                "phonenumber": "+79048908292",
+                "address": "Москва, ул. Новый Арбат, 55",
+                "items": items,
+            },
+            content_type="application/json",
+        )
+
+    def count_checkout_queries(self, products):
+        with CaptureQueriesContext(connection) as context:
+            response = self.checkout(
+                [{"product": product.id, "quantity": 2} for product in products]
+            )
+        self.assertEqual(response.status_code, 201)
+        return len(context)
+
+    def test_query_count_does_not_depend_on_basket_size(self):
+        """Проверка, что число запросов при оформлении не растёт с корзиной"""
+        small = self.count_checkout_queries(self.products[:1])
+        large = self.count_checkout_queries(self.products)
+
+        self.assertEqual(small, large)
+        order = Order.objects.with_item_count().first()
+        self.assertEqual(order.items_count, 15)
+        self.assertEqual(
+            sorted(order.items.values_list("fixed_price", flat=True)),
+            sorted(product.price for product in self.products),
+        )
+
+    def test_checkout_stores_order_total(self):
+        """Проверка, что оформленный заказ сохраняется с суммой позиций"""
+        response = self.checkout([{"product": self.products[0].id, "quantity": 3}])
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.json()["id"])
+        self.assertEqual(order.total, self.products[0].price * 3)
+        self.assertEqual(order.total, order.total_price())
+
+    def test_errors_stay_per_item(self):
+        """Проверка, что ошибки привязаны к позициям заказа"""
+        hidden = Product.objects.create(name="Секрет", price=1, is_available=False)
+
+        response = self.checkout(
+            [
+                {"product": self.products[0].id, "quantity": 1},
+                {"product": 9999, "quantity": 1},
+                {"product": hidden.id, "quantity": 1},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["items"]
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[1], {"product": ["Товар с ID 9999 не существует"]})
+        self.assertEqual(
+            errors[2], {"product": ["Товар «Секрет» недоступен для заказа"]}
+        )
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderBatchTestCase(TestCase):
+
+    def setUp(self):
+        self.products = [
+            Product.objects.create(name=f"Бургер {i}", price=100 + i) for i in range(5)
+        ]
+
+    def make_order(self, address="Москва, ул. Новый Арбат, 55", items=None):
+        return {
+            "firstname": "Иван",
+            "lastname": "Петров",
+            "phonenumber": "+79048908292",
+            "address": address,
+            "items": items
+            or [{"product": product.id, "quantity": 1} for product in self.products],
+        }
+
+    def send(self, orders):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/orders/batch/", orders, content_type="application/json"
+            )
+
+    def count_batch_queries(self, size):
+        with CaptureQueriesContext(connection) as context:
+            response = self.send([self.make_order() for _ in range(size)])
+        self.assertEqual(response.status_code, 201)
+        return len(context)
+
+    def test_creates_orders_with_constant_queries(self):
+        """Проверка, что пакет сохраняется за одно число запросов при любом размере"""
+        self.count_batch_queries(1)  # прогрев индекса меню
+        small = self.count_batch_queries(2)
+        large = self.count_batch_queries(20)
+
+        self.assertEqual(small, large)
+        self.assertEqual(Order.objects.count(), 23)
+        order = Order.objects.with_totals().first()
+        self.assertEqual(order.total, order.items_total)
+        self.assertEqual(order.total, sum(product.price for product in self.products))
+
+    def test_reports_results_per_order(self):
+        """Проверка, что невалидный заказ не мешает сохранить остальные"""
+        response = self.send(
+            [
+                self.make_order(),
+                self.make_order(items=[{"product": 9999, "quantity": 1}]),
+                self.make_order(address="коротко"),
+            ]
+        )
+
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual(response.json()["created"], 1)
+        self.assertTrue(Order.objects.filter(pk=results[0]["id"]).exists())
+        self.assertEqual(
+            results[1]["errors"]["items"][0],
+            {"product": ["Товар с ID 9999 не существует"]},
+        )
+        self.assertIn("address", results[2]["errors"])
+
+    def test_rejects_oversized_batch(self):
+        """Проверка, что пакет больше лимита отклоняется целиком"""
+        with patch("foodcartapp.views.ORDER_BATCH_LIMIT", 2):
+            response = self.send([self.make_order() for _ in range(3)])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_accepts_product_ids_as_strings(self):
+        """Проверка, что ID товара строкой принимается, а мусор даёт ошибку позиции"""
+        response = self.send(
+            [
+                self.make_order(
+                    items=[{"product": str(self.products[0].id), "quantity": 1}]
+                ),
+                self.make_order(items=[{"product": "бургер", "quantity": 1}]),
+            ]
+        )
+
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        order = Order.objects.get(pk=results[0]["id"])
+        self.assertEqual(order.items.get().product, self.products[0])
+        self.assertEqual(
+            results[1]["errors"]["items"][0],
+            {"product": ["Некорректный ID товара"]},
+        )
@@ -0,0 +1,142 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest.mock import patch
+
+import requests
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from geocoder.models import AddressCoordinates, coordinates_cache
+from geocoder.singleflight import SingleFlight
+
+
+class SingleFlightTestCase(TransactionTestCase):
+
+    def setUp(self):
+        coordinates_cache.clear()
+
+    def test_concurrent_lookups_share_one_upstream_call(self):
+        """Проверка, что одновременные запросы одного адреса дают один вызов API"""
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def slow_update(place):
+            calls.append(place.address)
+            time.sleep(0.2)
+            place.apply_result((55.75, 37.62))
+            place.save()
+
+        def lookup(address):
+            barrier.wait()
+            try:
+                place = AddressCoordinates.resolve(address)
+                return place.latitude, place.longitude
+            finally:
+                connection.close()
+
+        addresses = ["Москва, ул. Тверская, 1", "москва улица тверская 1"] * 4
+        with patch.object(
+            AddressCoordinates,
+            "update_from_api",
+            autospec=True,
+            side_effect=slow_update,
+        ):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lookup, addresses))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [(55.75, 37.62)] * 8)
+
+
+class CrossProcessRefreshTestCase(TestCase):
+
+    def setUp(self):
+        coordinates_cache.clear()
+        self.address = "Москва, ул. Тверская, 1"
+
+    def test_api_is_called_outside_transaction(self):
+        """Проверка, что запрос к API идёт без открытой транзакции и блокировок"""
+        depth = len(connection.atomic_blocks)
+        depths = []
+
+        def fetch(address):
+            depths.append(len(connection.atomic_blocks))
+            return (55.75, 37.62)
+
+        with patch("geocoder.models.fetch_coordinates", side_effect=fetch):
+            place = AddressCoordinates.resolve(self.address)
+
+        self.assertEqual(depths, [depth])
+        self.assertEqual((place.latitude, place.longitude), (55.75, 37.62))
+        self.assertIsNone(AddressCoordinates.objects.get().refreshing_until)
+
+    def test_waits_for_refresh_claimed_by_other_process(self):
+        """Проверка, что второй процесс ждёт чужой результат, а не зовёт API"""
+        AddressCoordinates.objects.create(address=self.address)
+        other = AddressCoordinates.objects.get()
+        self.assertTrue(other.claim_refresh())
+
+        def other_process_finishes(seconds):
+            other.apply_result((55.75, 37.62))
+            other.refreshing_until = None
+            other.save()
+            coordinates_cache.clear()
+
+        with patch("geocoder.models.fetch_coordinates") as fetch:
+            with patch(
+                "geocoder.models.time.sleep", side_effect=other_process_finishes
+            ):
+                place = AddressCoordinates.resolve(self.address)
+
+        fetch.assert_not_called()
+        self.assertEqual((place.latitude, place.longitude), (55.75, 37.62))
+
+    def test_abandoned_claim_expires(self):
+        """Проверка, что брошенную пометку можно перехватить после аренды"""
+        AddressCoordinates.objects.create(address=self.address)
+        AddressCoordinates.objects.update(
+            refreshing_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        with patch("geocoder.models.fetch_coordinates", return_value=(55.75, 37.62)):
+            place = AddressCoordinates.resolve(self.address)
+
+        self.assertEqual((place.latitude, place.longitude), (55.75, 37.62))
+
+    def test_failed_request_releases_claim(self):
+        """Проверка, что ошибка API снимает пометку обновления"""
+        with patch(
+            "geocoder.models.fetch_coordinates",
+            side_effect=requests.exceptions.ConnectionError,
+        ):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                AddressCoordinates.resolve(self.address)
+
+        self.assertIsNone(AddressCoordinates.objects.get().refreshing_until)
+
+
+class SingleFlightUnitTestCase(SimpleTestCase):
+
+    def test_followers_receive_leader_exception(self):
+        """Проверка, что ошибка первого вызова достаётся всем ожидающим"""
+        flights = SingleFlight()
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.1)
+            raise ConnectionError("upstream is down")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flights.do, "key", failing)
+            started.wait()
+            follower = executor.submit(flights.do, "key", lambda: "second call")
+
+            with self.assertRaises(ConnectionError):
+                leader.result()
+            with self.assertRaises(ConnectionError):
+                follower.result()
+        self.assertEqual(flights.in_flight(), 0)
@@ -0,0 +1,121 @@
+import random
+
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+
+from foodcartapp.distances import haversine_matrix
+from foodcartapp.models import Order, Restaurant
+from foodcartapp.spatial import GridIndex, restaurant_index
+
+
+class GridIndexTestCase(SimpleTestCase):
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.grid = GridIndex()
+        self.points = {}
+        for key in range(300):
+            point = (55.5 + rng.random() * 0.5, 37.3 + rng.random() * 0.6)
+            self.points[key] = point
+            self.grid.add(key, *point)
+
+    def test_matches_brute_force(self):
+        """Проверка, что поиск по сетке совпадает с полным перебором"""
+        origin = (55.75, 37.62)
+        keys = list(self.points)
+        distances = haversine_matrix([origin], [self.points[k] for k in keys])[0]
+        expected = sorted((d, k) for k, d in zip(keys, distances) if d <= 5)[:10]
+
+        found = self.grid.nearest(*origin, k=10, radius_km=5)
+
+        self.assertEqual([k for k, _ in found], [k for _, k in expected])
+
+    def test_remove_point(self):
+        """Проверка, что удалённая точка больше не находится"""
+        nearest_key, _ = self.grid.nearest(55.75, 37.62, k=1)[0]
+        self.grid.remove(nearest_key)
+
+        self.assertNotIn(nearest_key, [k for k, _ in self.grid.nearest(55.75, 37.62)])
+        self.assertEqual(len(self.grid), 299)
+
+
+class RestaurantNearestTestCase(TestCase):
+
+    def setUp(self):
+        restaurant_index.invalidate()
+        self.near = Restaurant.objects.create(
+            name="Арбат", latitude=55.7520, longitude=37.5870
+        )
+        self.far = Restaurant.objects.create(
+            name="Калуга", latitude=54.5293, longitude=36.2754
+        )
+
+    def test_nearest_within_radius(self):
+        """Проверка, что находятся только рестораны в пределах радиуса"""
+        nearest = Restaurant.objects.nearest_to(55.7558, 37.6173, radius_km=10)
+
+        self.assertEqual(nearest, [self.near])
+        self.assertEqual(nearest[0].distance, 1.9)
+
+    def test_respects_queryset_filter(self):
+        """Проверка, что учитываются только рестораны из выборки"""
+        nearest = Restaurant.objects.exclude(pk=self.near.pk).nearest_to(
+            55.7558, 37.6173, k=1
+        )
+
+        self.assertEqual(nearest, [self.far])
+
+    def test_index_follows_restaurant_changes(self):
+        """Проверка, что индекс обновляется при сохранении ресторана"""
+        Restaurant.objects.nearest_to(55.7558, 37.6173)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.far.latitude, self.far.longitude = 55.7560, 37.6170
+            self.far.save()
+            before_commit = Restaurant.objects.nearest_to(55.7558, 37.6173, k=1)
+
+        nearest = Restaurant.objects.nearest_to(55.7558, 37.6173, k=1)
+
+        self.assertEqual(before_commit, [self.near])
+        self.assertEqual(nearest, [self.far])
+
+    def test_rank_limits_radius(self):
+        """Проверка, что rank отдаёт только подходящие рестораны в пределах радиуса"""
+        order = Order(id=1, latitude=55.7558, longitude=37.6173)
+        candidates = {order.id: [self.near, self.far]}
+
+        ranked = restaurant_index.rank([order], candidates, radius_km=50)
+
+        self.assertEqual(
+            ranked, {order.id: [{"restaurant": self.near, "distance": 1.9}]}
+        )
+
+    def test_rank_uses_loaded_coordinates(self):
+        """Проверка, что rank сверяет индекс с загруженными координатами"""
+        Restaurant.objects.nearest_to(55.7558, 37.6173)
+        Restaurant.objects.filter(pk=self.far.pk).update(
+            latitude=55.7560, longitude=37.6170
+        )
+        self.far.refresh_from_db()
+        order = Order(id=1, latitude=55.7558, longitude=37.6173)
+
+        ranked = restaurant_index.rank([order], {order.id: [self.near, self.far]}, k=1)
+
+        self.assertEqual(ranked[order.id][0]["restaurant"], self.far)
+
+    def test_rank_keeps_uncommitted_coordinates_local(self):
+        """Проверка, что откаченные координаты не остаются в общем индексе"""
+        order = Order(id=1, latitude=55.7558, longitude=37.6173)
+        restaurant_index.nearest(55.7558, 37.6173)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Restaurant.objects.filter(pk=self.far.pk).update(
+                    latitude=55.7560, longitude=37.6170
+                )
+                self.far.refresh_from_db()
+                ranked = restaurant_index.rank([order], {order.id: [self.far]})
+                self.assertEqual(ranked[order.id][0]["distance"], 0.0)
+                raise RuntimeError
+
+        nearest = restaurant_index.nearest(55.7558, 37.6173, k=1)
+        self.assertEqual([key for key, _ in nearest], [self.near.id])
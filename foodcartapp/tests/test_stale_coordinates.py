@@ -0,0 +1,80 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from geocoder.models import AddressCoordinates, GeocodingJob, coordinates_cache
+
+
+class StaleCoordinatesTestCase(TestCase):
+
+    def setUp(self):
+        self.address = "Москва, Красная площадь, 11"
+        AddressCoordinates.objects.create(
+            address=self.address, latitude=55.75, longitude=37.62
+        )
+        AddressCoordinates.objects.update(
+            updated_at=timezone.now() - timezone.timedelta(days=31)
+        )
+        coordinates_cache.clear()
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_stale_coordinates_are_served_immediately(self, mock_fetch):
+        """Проверка, что устаревшие координаты отдаются без запроса к API"""
+        coords = AddressCoordinates.lookup(self.address)
+
+        self.assertEqual(coords, (55.75, 37.62))
+        mock_fetch.assert_not_called()
+        self.assertTrue(GeocodingJob.objects.filter(address=self.address).exists())
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_refresher_updates_expiring_rows(self, mock_fetch):
+        """Проверка, что фоновое обновление перезапрашивает устаревшие записи"""
+        mock_fetch.return_value = (55.76, 37.61)
+
+        call_command("refresh_coordinates", once=True, rps=0, stdout=StringIO())
+
+        place = AddressCoordinates.objects.get()
+        self.assertEqual((place.latitude, place.longitude), (55.76, 37.61))
+        self.assertFalse(place.requires_refresh())
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_refresh_keeps_coordinates_when_address_disappears(self, mock_fetch):
+        """Проверка, что пустой ответ не затирает известные координаты"""
+        mock_fetch.return_value = None
+
+        AddressCoordinates.objects.get().update_from_api()
+
+        place = AddressCoordinates.objects.get()
+        self.assertEqual((place.latitude, place.longitude), (55.75, 37.62))
+        self.assertFalse(place.requires_refresh())
+
+    @patch("geocoder.models.fetch_coordinates")
+    def test_refresher_postpones_failed_rows(self, mock_fetch):
+        """Проверка, что кривой ответ не роняет обновление и откладывает запись"""
+        other = AddressCoordinates.objects.create(
+            address="Москва, ул. Тверская, 1", latitude=55.76, longitude=37.61
+        )
+        AddressCoordinates.objects.filter(pk=other.pk).update(
+            updated_at=timezone.now() - timezone.timedelta(days=30, hours=1)
+        )
+        mock_fetch.side_effect = lambda address: (
+            {}["Point"] if address == self.address else (55.77, 37.6)
+        )
+
+        call_command(
+            "refresh_coordinates",
+            once=True,
+            rps=0,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+        other.refresh_from_db()
+        self.assertEqual((other.latitude, other.longitude), (55.77, 37.6))
+        self.assertFalse(AddressCoordinates.objects.expiring().exists())
+        self.assertEqual(
+            AddressCoordinates.objects.get(address=self.address).latitude, 55.75
+        )
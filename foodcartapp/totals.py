@@ -0,0 +1,11 @@
+from foodcartapp.models import Order
+from foodcartapp.on_commit import schedule_on_commit
+
+
+def schedule_totals_refresh(order_ids):
+    """Откладывает пересчёт сумм заказов до фиксации транзакции."""
+    schedule_on_commit("totals", order_ids, flush_totals_refresh)
+
+
+def flush_totals_refresh(order_ids):
+    Order.objects.filter(pk__in=order_ids).update_totals()
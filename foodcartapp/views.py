@@ -1,3 +1,6 @@
+import hashlib
+import json
+
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework import status
@@ -5,7 +8,7 @@ from rest_framework import status
 from django.http import JsonResponse
 from django.templatetags.static import static
 
-from .models import Product, Order
+from .models import IdempotencyKey, Product, Order
 from .serializers import OrderSerializer
 
 
@@ -14,12 +17,78 @@ class OrderCreateView(generics.CreateAPIView):
     queryset = Order.objects.all()
 
     def create(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return self.create_order(request)
+        if not key or len(key) > 255:
+            return Response(
+                {'error': 'Idempotency-Key должен быть длиной от 1 до 255 символов'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        record, is_owner = IdempotencyKey.acquire(key, fingerprint)
+        if record.fingerprint != fingerprint:
+            return Response(
+                {'error': 'Idempotency-Key уже использован с другим заказом'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if not is_owner:
+            if record.wait() is None:
+                return Response(
+                    {'error': 'Заказ с этим Idempotency-Key ещё обрабатывается'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            return Response(
+                record.response,
+                status=record.status_code,
+                headers={'Idempotent-Replayed': 'true'},
+            )
+
+        try:
+            response = self.create_order(request)
+        except Exception:
+            record.delete()
+            raise
+        record.complete(response.status_code, response.data)
+        return response
+
+    def create_order(self, request):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         self.perform_create(serializer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+ORDER_BATCH_LIMIT = 1000
+
+
+class OrderBatchCreateView(generics.GenericAPIView):
+    serializer_class = OrderSerializer
+    queryset = Order.objects.all()
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=ORDER_BATCH_LIMIT
+        )
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data:
+            serializer.save()
+
+        results = serializer.results
+        created = sum('id' in result for result in results)
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'results': results}, status=response_status)
+
+
 def banners_list_api(request):
     return JsonResponse([
         {
@@ -1,3 +1,17 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from .models import GeocodingJob
+
+
+@admin.register(GeocodingJob)
+class GeocodingJobAdmin(admin.ModelAdmin):
+    list_display = ("address", "attempts", "run_after", "last_error")
+    search_fields = ["address"]
+    readonly_fields = ["address_hash", "created_at"]
+    actions = ["reset_attempts"]
+
+    @admin.action(description="Сбросить попытки и запустить заново")
+    def reset_attempts(self, request, queryset):
+        reset = queryset.update(attempts=0, last_error="", run_after=timezone.now())
+        self.message_user(request, f"Задач запущено заново: {reset}")
@@ -0,0 +1,13 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.GEOCODER_BACKEND)()
+
+
+def fetch_coordinates(address):
+    return get_backend().geocode(address)
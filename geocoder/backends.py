@@ -0,0 +1,141 @@
+import csv
+import hashlib
+import io
+import json
+
+from django.conf import settings
+
+from .client import CircuitBreaker, GeocoderClient
+from .normalization import make_address_hash, normalize_address
+
+
+def parse_response(data):
+    collection = data.get("response", {}).get("GeoObjectCollection", {})
+    features = collection.get("featureMember", [])
+    if not features:
+        return None
+
+    lon, lat = map(float, features[0]["GeoObject"]["Point"]["pos"].split())
+    return lat, lon
+
+
+def build_response(coords):
+    features = []
+    if coords:
+        lat, lon = coords
+        features.append({"GeoObject": {"Point": {"pos": f"{lon} {lat}"}}})
+    return {"response": {"GeoObjectCollection": {"featureMember": features}}}
+
+
+class BaseGeocoder:
+    def geocode(self, address):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+class YandexGeocoder(BaseGeocoder):
+    url = "https://geocode-maps.yandex.ru/1.x/"
+
+    def __init__(self, url=None, api_key=None):
+        self.api_key = api_key or settings.YANDEX_GEOCODER_API_KEY
+        self.client = GeocoderClient(
+            url or self.url,
+            timeout=settings.GEOCODER_TIMEOUT,
+            pool_size=settings.GEOCODER_POOL_SIZE,
+            max_retries=settings.GEOCODER_MAX_RETRIES,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.GEOCODER_BREAKER_THRESHOLD,
+                reset_timeout=settings.GEOCODER_BREAKER_TIMEOUT,
+            ),
+        )
+
+    def geocode(self, address):
+        data = self.client.get_json(
+            {"apikey": self.api_key, "format": "json", "geocode": address}
+        )
+        return parse_response(data)
+
+    def stats(self):
+        return self.client.stats.snapshot()
+
+
+class StubGeocoder(YandexGeocoder):
+    """Yandex-совместимый клиент для локального сервера run_geocoder_stub."""
+
+    def __init__(self, url=None, api_key=None):
+        super().__init__(url or settings.GEOCODER_STUB_URL, api_key or "stub")
+
+
+class OfflineGeocoder(BaseGeocoder):
+    """Детерминированный геокодер без сети для тестов и нагрузочных прогонов.
+
+    Известные адреса берутся из справочника (CSV с колонками address,
+    latitude, longitude или JSON-фикстура), остальным назначается точка
+    в окрестностях центра города, вычисленная по хэшу адреса.
+    В режиме strict адреса вне справочника считаются ненайденными.
+    """
+
+    center = (55.751244, 37.618423)
+    span = 0.3
+    # Фикстуры проекта (data.json) выгружены в cp1251, свежие справочники в utf-8
+    encodings = ("utf-8-sig", "cp1251")
+
+    def __init__(self, gazetteer=None, strict=False):
+        self.strict = strict
+        self.places = {}
+        gazetteer = gazetteer or settings.GEOCODER_GAZETTEER
+        if gazetteer:
+            self.load(gazetteer)
+
+    def load(self, path):
+        with open(path, "rb") as file:
+            content = self.decode(file.read())
+        if path.endswith(".json"):
+            rows = [
+                item["fields"]
+                for item in json.loads(content)
+                if "address" in item.get("fields", {})
+            ]
+        else:
+            rows = list(csv.DictReader(io.StringIO(content)))
+
+        for row in rows:
+            if not row["address"]:
+                continue
+            # Адресам из фикстуры без координат назначаем синтетическую точку,
+            # чтобы они находились и в режиме strict
+            if row.get("latitude") in (None, "") or row.get("longitude") in (None, ""):
+                coords = self.synthesize(row["address"])
+            else:
+                coords = float(row["latitude"]), float(row["longitude"])
+            if coords:
+                self.places[make_address_hash(row["address"])] = coords
+
+    def decode(self, content):
+        for encoding in self.encodings[:-1]:
+            try:
+                return content.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+        return content.decode(self.encodings[-1])
+
+    def geocode(self, address):
+        coords = self.places.get(make_address_hash(address))
+        if coords or self.strict:
+            return coords
+        return self.synthesize(address)
+
+    def synthesize(self, address):
+        normalized = normalize_address(address)
+        if not normalized:
+            return None
+        digest = hashlib.blake2b(normalized.encode(), digest_size=8).digest()
+        lat_part = int.from_bytes(digest[:4], "big") / 2**32
+        lon_part = int.from_bytes(digest[4:], "big") / 2**32
+        lat, lon = self.center
+        return (
+            round(lat + (lat_part - 0.5) * self.span, 6),
+            round(lon + (lon_part - 0.5) * self.span, 6),
+        )
@@ -0,0 +1,138 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GeocoderUnavailable(requests.exceptions.RequestException):
+    pass
+
+
+class CircuitBreaker:
+    """Перестаёт пускать запросы после серии ошибок и пробует снова через паузу."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Пропускаем пробный запрос, остальные ждут его результата
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class LatencyStats:
+    def __init__(self, window=1000):
+        self.calls = 0
+        self.errors = 0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok=True):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            self._samples.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            calls, errors = self.calls, self.errors
+        if not samples:
+            return {"calls": calls, "errors": errors}
+        return {
+            "calls": calls,
+            "errors": errors,
+            "avg": sum(samples) / len(samples),
+            "p50": samples[len(samples) // 2],
+            "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            "max": samples[-1],
+        }
+
+
+class GeocoderClient:
+    def __init__(
+        self,
+        url,
+        timeout=5,
+        pool_size=10,
+        max_retries=2,
+        backoff=0.2,
+        breaker=None,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = LatencyStats()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_json(self, params):
+        if not self.breaker.allow():
+            raise GeocoderUnavailable("Геокодер временно недоступен")
+
+        for attempt in range(self.max_retries + 1):
+            started_at = time.monotonic()
+            try:
+                response = self.session.get(
+                    self.url, params=params, timeout=self.timeout
+                )
+                response.raise_for_status()
+                data = response.json()
+            except requests.exceptions.RequestException as e:
+                self.stats.record(time.monotonic() - started_at, ok=False)
+                if not self.is_retryable(e):
+                    # Ошибка в самом запросе (400, 404, кривой ответ) не говорит
+                    # о недоступности геокодера и не должна размыкать цепь
+                    raise
+                if attempt == self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+                time.sleep(random.uniform(0, self.backoff * 2**attempt))
+            else:
+                self.stats.record(time.monotonic() - started_at)
+                self.breaker.record_success()
+                return data
+
+    def is_retryable(self, error):
+        if isinstance(error, requests.exceptions.HTTPError):
+            return error.response.status_code in RETRY_STATUSES
+        return isinstance(
+            error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+        )
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,57 @@
+import time
+from datetime import timedelta
+
+import requests
+from django.core.management.base import BaseCommand
+
+from geocoder.models import AddressCoordinates
+from geocoder.throttling import RateLimiter
+
+
+class Command(BaseCommand):
+    help = "Фоново обновляет устаревшие и скоро устаревающие координаты адресов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead-hours",
+            type=float,
+            default=24,
+            help="Обновлять записи, которые устареют в ближайшие часы",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=100, help="Записей за один проход"
+        )
+        parser.add_argument(
+            "--rps", type=float, default=5, help="Максимум запросов к API в секунду"
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=60, help="Пауза между проходами, секунд"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Сделать один проход и завершиться"
+        )
+
+    def handle(self, *args, **options):
+        limiter = RateLimiter(options["rps"])
+        ahead = timedelta(hours=options["ahead_hours"])
+        while True:
+            refreshed = self.refresh_batch(ahead, options["batch_size"], limiter)
+            if refreshed:
+                self.stdout.write(f"Обновлено записей: {refreshed}")
+            if options["once"]:
+                return
+            if refreshed < options["batch_size"]:
+                time.sleep(options["sleep"])
+
+    def refresh_batch(self, ahead, batch_size, limiter):
+        refreshed = 0
+        for place in AddressCoordinates.objects.expiring(ahead)[:batch_size]:
+            limiter.wait()
+            try:
+                place.update_from_api()
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                self.stderr.write(f"{place.address}: {e}")
+                place.postpone_refresh()
+                continue
+            refreshed += 1
+        return refreshed
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from geocoder.backends import OfflineGeocoder
+from geocoder.stub import make_stub_server
+
+
+class Command(BaseCommand):
+    help = "Запускает локальную заглушку Yandex-геокодера с заданной задержкой"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument(
+            "--latency", type=float, default=0.1, help="Задержка ответа, секунд"
+        )
+        parser.add_argument(
+            "--jitter", type=float, default=0, help="Случайная добавка к задержке"
+        )
+        parser.add_argument(
+            "--gazetteer", help="CSV или JSON-фикстура с известными координатами"
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Не находить адреса, которых нет в справочнике",
+        )
+
+    def handle(self, *args, **options):
+        geocoder = OfflineGeocoder(options["gazetteer"], strict=options["strict"])
+        server = make_stub_server(
+            geocoder,
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            jitter=options["jitter"],
+        )
+        host, port = server.server_address
+        self.stdout.write(f"Заглушка геокодера слушает http://{host}:{port}/1.x/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
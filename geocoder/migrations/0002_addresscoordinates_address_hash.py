@@ -0,0 +1,100 @@
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Копия geocoder.normalization на момент миграции, чтобы последующие
+# изменения нормализации не меняли результат уже написанной миграции
+
+ABBREVIATIONS = {
+    "г": "город",
+    "обл": "область",
+    "р-н": "район",
+    "мкр": "микрорайон",
+    "ул": "улица",
+    "пр": "проспект",
+    "пр-т": "проспект",
+    "просп": "проспект",
+    "пр-д": "проезд",
+    "пер": "переулок",
+    "пл": "площадь",
+    "б-р": "бульвар",
+    "бул": "бульвар",
+    "наб": "набережная",
+    "ш": "шоссе",
+    "д": "дом",
+    "корп": "корпус",
+    "к": "корпус",
+    "стр": "строение",
+}
+
+TOKEN_RE = re.compile(r"\w+(?:-\w+)*")
+
+
+def normalize_address(address):
+    text = unicodedata.normalize("NFKC", address).casefold().replace("ё", "е")
+    tokens = TOKEN_RE.findall(text)
+    return " ".join(ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+def make_address_hash(address):
+    normalized = normalize_address(address)
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def fill_address_hash(apps, schema_editor):
+    AddressCoordinates = apps.get_model("geocoder", "AddressCoordinates")
+    rows = AddressCoordinates.objects.order_by("-updated_at")
+    # Из дублей оставляем запись с координатами, а среди них самую свежую
+    seen = set()
+    for has_coordinates in (True, False):
+        duplicates = rows.filter(latitude__isnull=not has_coordinates)
+        for row in duplicates.iterator():
+            key = make_address_hash(row.address)
+            if key in seen:
+                row.delete()
+                continue
+            seen.add(key)
+            row.address_hash = key
+            row.save(update_fields=["address_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geocoder", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="addresscoordinates",
+            name="geocoder_ad_address_1f6f8c_idx",
+        ),
+        migrations.AlterField(
+            model_name="addresscoordinates",
+            name="address",
+            field=models.TextField(max_length=200, verbose_name="Адрес места"),
+        ),
+        migrations.AddField(
+            model_name="addresscoordinates",
+            name="address_hash",
+            field=models.CharField(
+                editable=False,
+                max_length=32,
+                null=True,
+                verbose_name="Хэш нормализованного адреса",
+            ),
+        ),
+        migrations.RunPython(fill_address_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="addresscoordinates",
+            name="address_hash",
+            field=models.CharField(
+                editable=False,
+                max_length=32,
+                unique=True,
+                verbose_name="Хэш нормализованного адреса",
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geocoder", "0002_addresscoordinates_address_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GeocodingJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("address", models.TextField(max_length=200, verbose_name="Адрес")),
+                (
+                    "address_hash",
+                    models.CharField(
+                        editable=False,
+                        max_length=32,
+                        unique=True,
+                        verbose_name="Хэш нормализованного адреса",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="Попыток"),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, verbose_name="Последняя ошибка"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "run_after",
+                    models.DateTimeField(
+                        db_index=True,
+                        default=django.utils.timezone.now,
+                        verbose_name="Не раньше",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "задача геокодирования",
+                "verbose_name_plural": "задачи геокодирования",
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+
+def mark_found(apps, schema_editor):
+    AddressCoordinates = apps.get_model("geocoder", "AddressCoordinates")
+    AddressCoordinates.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).update(status="found")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geocoder", "0003_geocodingjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="addresscoordinates",
+            name="misses",
+            field=models.PositiveSmallIntegerField(
+                default=0, verbose_name="Неудачных поисков подряд"
+            ),
+        ),
+        migrations.AddField(
+            model_name="addresscoordinates",
+            name="retry_after",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Повторить поиск не раньше"
+            ),
+        ),
+        migrations.AddField(
+            model_name="addresscoordinates",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("unknown", "Не определён"),
+                    ("found", "Найден"),
+                    ("not_found", "Не найден"),
+                ],
+                default="unknown",
+                max_length=20,
+                verbose_name="Результат геокодирования",
+            ),
+        ),
+        migrations.RunPython(mark_found, migrations.RunPython.noop),
+    ]
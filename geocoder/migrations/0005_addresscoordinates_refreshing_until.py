@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("geocoder", "0004_negative_cache"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="addresscoordinates",
+            name="refreshing_until",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Обновляется до"
+            ),
+        ),
+    ]
@@ -1,85 +1,325 @@
-import requests
+import time
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 
 from django.utils import timezone
 from datetime import timedelta
 
 import logging
 
+from .api import fetch_coordinates
+from .cache import CoordinatesCache
+from .normalization import make_address_hash
+from .singleflight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
 
+class AddressCoordinatesQuerySet(models.QuerySet):
+    def for_address(self, address):
+        return self.filter(address_hash=make_address_hash(address))
+
+    def expiring(self, ahead=timedelta(0)):
+        now = timezone.now()
+        deadline = now - AddressCoordinates.CACHE_TTL + ahead
+        return (
+            self.filter(status=AddressCoordinates.STATUS_FOUND, updated_at__lt=deadline)
+            .filter(Q(retry_after__isnull=True) | Q(retry_after__lte=now))
+            .order_by("updated_at")
+        )
+
+
 class AddressCoordinates(models.Model):
-    address = models.TextField("Адрес места", max_length=200, unique=True)
+    address = models.TextField("Адрес места", max_length=200)
+    address_hash = models.CharField(
+        "Хэш нормализованного адреса", max_length=32, unique=True, editable=False
+    )
+    STATUS_UNKNOWN = "unknown"
+    STATUS_FOUND = "found"
+    STATUS_NOT_FOUND = "not_found"
+    STATUS_CHOICES = [
+        (STATUS_UNKNOWN, "Не определён"),
+        (STATUS_FOUND, "Найден"),
+        (STATUS_NOT_FOUND, "Не найден"),
+    ]
+
     latitude = models.FloatField("Широта", null=True, blank=True)
     longitude = models.FloatField("Долгота", null=True, blank=True)
+    status = models.CharField(
+        "Результат геокодирования",
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_UNKNOWN,
+    )
+    misses = models.PositiveSmallIntegerField("Неудачных поисков подряд", default=0)
+    retry_after = models.DateTimeField(
+        "Повторить поиск не раньше", null=True, blank=True
+    )
     updated_at = models.DateTimeField(
         "Дата/время обновления", auto_now=True, db_index=True
     )
+    refreshing_until = models.DateTimeField(
+        "Обновляется до", null=True, blank=True, editable=False
+    )
 
     def is_fresh(self):
         return timezone.now() - self.updated_at < timedelta(days=30)
 
     CACHE_TTL = timezone.timedelta(days=30)
+    NEGATIVE_CACHE_TTL = timezone.timedelta(hours=1)
+    STALE_CACHE_TTL = timezone.timedelta(minutes=10)
+    # Сколько длится запрос к API со всеми повторами; дольше этого пометку
+    # refreshing_until считаем брошенной, и адрес может обновить другой процесс
+    REFRESH_LEASE = timezone.timedelta(
+        seconds=settings.GEOCODER_TIMEOUT * (settings.GEOCODER_MAX_RETRIES + 1) + 5
+    )
+    REFRESH_POLL_INTERVAL = 0.1
+
+    objects = AddressCoordinatesQuerySet.as_manager()
 
     class Meta:
         verbose_name = "координаты адреса"
         verbose_name_plural = "координаты адресов"
         indexes = [
-            models.Index(fields=["address"]),
             models.Index(fields=["updated_at"]),
         ]
 
+    @classmethod
+    def lookup(cls, address):
+        key = make_address_hash(address)
+        coords = coordinates_cache.get(key)
+        if coords is not None:
+            return coords
+        obj = cls.objects.filter(address_hash=key).first()
+        if obj is None:
+            return None, None
+        if obj.is_stale():
+            # Отдаём устаревшие координаты сразу, а обновляет их фоновый обработчик
+            GeocodingJob.enqueue(address)
+        obj.remember()
+        return obj.latitude, obj.longitude
+
+    @classmethod
+    def lookup_many(cls, addresses):
+        """Пакетный lookup: кэш, затем один запрос к базе на все промахи."""
+        keys = {address: make_address_hash(address) for address in addresses}
+        found, missing = {}, {}
+        for address, key in keys.items():
+            coords = coordinates_cache.get(key)
+            if coords is None:
+                missing.setdefault(key, []).append(address)
+            else:
+                found[address] = coords
+
+        stale = []
+        for obj in cls.objects.filter(address_hash__in=missing):
+            if obj.is_stale():
+                stale.append(obj.address)
+            obj.remember()
+            for address in missing[obj.address_hash]:
+                found[address] = (obj.latitude, obj.longitude)
+        GeocodingJob.enqueue_many(stale)
+        return {address: found.get(address, (None, None)) for address in keys}
+
+    def remember(self):
+        if self.status == self.STATUS_NOT_FOUND:
+            coordinates_cache.set(self.address_hash, (None, None), self.retry_after)
+        elif self.latitude is None or self.longitude is None:
+            coordinates_cache.discard(self.address_hash)
+        else:
+            expires_at = max(
+                self.updated_at + self.CACHE_TTL,
+                timezone.now() + self.STALE_CACHE_TTL,
+            )
+            coordinates_cache.set(
+                self.address_hash, (self.latitude, self.longitude), expires_at
+            )
+
+    def save(self, *args, **kwargs):
+        self.address_hash = make_address_hash(self.address)
+        if self.status == self.STATUS_UNKNOWN and self.latitude is not None:
+            self.status = self.STATUS_FOUND
+        super().save(*args, **kwargs)
+        self.remember()
+
     @classmethod
     def get_or_create(cls, address):
-        obj, created = cls.objects.get_or_create(address=address)
-        if created or obj.requires_refresh():
+        return cls.resolve(address)
+
+    @classmethod
+    def resolve(cls, address):
+        key = make_address_hash(address)
+        return geocoder_flights.do(key, lambda: cls._resolve(address, key))
+
+    @classmethod
+    def _resolve(cls, address, key):
+        obj, _ = cls.objects.get_or_create(
+            address_hash=key, defaults={"address": address}
+        )
+        if obj.requires_refresh():
             obj.update_from_api()
         return obj
 
     def requires_refresh(self):
-        if not self.updated_at:
+        if self.status == self.STATUS_NOT_FOUND:
+            return timezone.now() >= self.retry_after
+        if self.latitude is None or not self.updated_at:
             return True
         return (timezone.now() - self.updated_at) > self.CACHE_TTL
 
+    def is_stale(self):
+        return self.status == self.STATUS_FOUND and self.requires_refresh()
+
+    def apply_result(self, coords):
+        self.updated_at = timezone.now()
+        if coords:
+            self.latitude, self.longitude = coords
+            self.status = self.STATUS_FOUND
+            self.misses = 0
+            self.retry_after = None
+            return
+        backoff = min(self.NEGATIVE_CACHE_TTL * 2**self.misses, self.CACHE_TTL)
+        self.latitude = None
+        self.longitude = None
+        self.status = self.STATUS_NOT_FOUND
+        self.misses += 1
+        self.retry_after = self.updated_at + backoff
+
     def update_from_api(self):
-        try:
-            response = requests.get(
-                "https://geocode-maps.yandex.ru/1.x/",
-                params={
-                    "apikey": settings.YANDEX_GEOCODER_API_KEY,
-                    "format": "json",
-                    "geocode": self.address,
-                },
-                timeout=5,
-            )
-            response.raise_for_status()
+        """Запрашивает координаты у геокодера, если их не обновляет кто-то ещё.
 
-            data = response.json()
-            collection = data.get("response", {}).get("GeoObjectCollection", {})
-            features = collection.get("featureMember", [])
+        Запись помечается refreshing_until одним коротким UPDATE, сам запрос
+        к API идёт вне транзакции и без блокировок. Другие процессы, которым
+        нужен тот же адрес, ждут результата вместо повторного запроса.
+        """
+        if not self.claim_refresh():
+            self.wait_for_refresh()
+            return
 
-            if features:
-                point = features[0]["GeoObject"]["Point"]
-                lon, lat = map(float, point["pos"].split())
-                self.latitude = lat
-                self.longitude = lon
-            else:
-                logger.warning(f"No coordinates found for address: {self.address}")
-                self.latitude = None
-                self.longitude = None
-            self.save()
-        except requests.exceptions.RequestException as e:
+        try:
+            coords = fetch_coordinates(self.address)
+        except Exception as e:
             logger.error(f"API request failed for {self.address}: {str(e)}")
-            if not self.pk:
-                self.delete()
+            self.refreshing_until = None
+            AddressCoordinates.objects.filter(pk=self.pk).update(refreshing_until=None)
             raise
-        except Exception as e:
-            logger.error(f"Ошибка обновления координат: {str(e)}")
+
+        self.refreshing_until = None
+        if not coords and self.status == self.STATUS_FOUND:
+            logger.warning(f"Address is no longer found, keeping: {self.address}")
+            self.save()
+            return
+        if not coords:
+            logger.warning(f"No coordinates found for address: {self.address}")
+        self.apply_result(coords)
         self.save()
-        raise
+
+    def postpone_refresh(self):
+        """Откладывает фоновое обновление записи после неудачного запроса."""
+        self.retry_after = timezone.now() + self.NEGATIVE_CACHE_TTL
+        AddressCoordinates.objects.filter(pk=self.pk).update(
+            retry_after=self.retry_after
+        )
+
+    def claim_refresh(self):
+        now = timezone.now()
+        claimed = (
+            AddressCoordinates.objects.filter(pk=self.pk)
+            .filter(Q(refreshing_until__isnull=True) | Q(refreshing_until__lte=now))
+            .update(refreshing_until=now + self.REFRESH_LEASE)
+        )
+        return bool(claimed)
+
+    def wait_for_refresh(self):
+        deadline = time.monotonic() + self.REFRESH_LEASE.total_seconds()
+        while time.monotonic() < deadline:
+            time.sleep(self.REFRESH_POLL_INTERVAL)
+            self.refresh_from_db()
+            if self.refreshing_until is None or self.refreshing_until <= timezone.now():
+                break
+        self.remember()
 
     def __str__(self):
         return f"{self.address} ({self.latitude}, {self.longitude})"
+
+
+coordinates_cache = CoordinatesCache(maxsize=settings.GEOCODER_CACHE_SIZE)
+geocoder_flights = SingleFlight()
+
+
+class GeocodingJob(models.Model):
+    MAX_ATTEMPTS = 5
+    # Взятая в работу задача снова становится доступной, если обработчик
+    # не отчитался о ней за это время (например, упал посреди пачки)
+    CLAIM_TIMEOUT = timedelta(minutes=10)
+
+    address = models.TextField("Адрес", max_length=200)
+    address_hash = models.CharField(
+        "Хэш нормализованного адреса", max_length=32, unique=True, editable=False
+    )
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    created_at = models.DateTimeField("Дата создания", auto_now_add=True)
+    run_after = models.DateTimeField("Не раньше", default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "задача геокодирования"
+        verbose_name_plural = "задачи геокодирования"
+
+    @classmethod
+    def enqueue(cls, address):
+        cls.enqueue_many([address])
+
+    @classmethod
+    def enqueue_many(cls, addresses):
+        """Ставит адреса в очередь.
+
+        Уже стоящая задача снова становится доступной сразу, а счётчик
+        попыток сбрасывается: задачу, исчерпавшую MAX_ATTEMPTS, оживляет
+        новый заказ. Если задачу сейчас геокодирует обработчик, он не удалит
+        её, и адрес разберут повторно для объектов, сохранённых после того,
+        как задачу взяли в работу.
+        """
+        jobs = {make_address_hash(address): address for address in addresses}
+        cls.objects.bulk_create(
+            [cls(address=address, address_hash=key) for key, address in jobs.items()],
+            update_conflicts=True,
+            unique_fields=["address_hash"],
+            update_fields=["run_after", "attempts", "last_error"],
+        )
+
+    @classmethod
+    def due(cls):
+        return cls.objects.filter(
+            run_after__lte=timezone.now(), attempts__lt=cls.MAX_ATTEMPTS
+        ).order_by("run_after")
+
+    @classmethod
+    def claim(cls, limit):
+        """Забирает до limit задач в работу короткой транзакцией.
+
+        Задачи откладываются на CLAIM_TIMEOUT, поэтому другие обработчики
+        их не видят, пока этот геокодирует адреса вне транзакции.
+        """
+        with transaction.atomic():
+            jobs = list(cls.due().select_for_update(skip_locked=True)[:limit])
+            cls.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                run_after=timezone.now() + cls.CLAIM_TIMEOUT
+            )
+        return jobs
+
+    @classmethod
+    def claimed(cls):
+        """Задачи, которые всё ещё числятся взятыми в работу."""
+        return cls.objects.filter(run_after__gt=timezone.now())
+
+    def postpone(self, error):
+        self.attempts += 1
+        self.last_error = str(error)
+        self.run_after = timezone.now() + timedelta(minutes=2**self.attempts)
+        self.save(update_fields=["attempts", "last_error", "run_after"])
+
+    def __str__(self):
+        return self.address
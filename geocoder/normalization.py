@@ -0,0 +1,38 @@
+import hashlib
+import re
+import unicodedata
+
+ABBREVIATIONS = {
+    "г": "город",
+    "обл": "область",
+    "р-н": "район",
+    "мкр": "микрорайон",
+    "ул": "улица",
+    "пр": "проспект",
+    "пр-т": "проспект",
+    "просп": "проспект",
+    "пр-д": "проезд",
+    "пер": "переулок",
+    "пл": "площадь",
+    "б-р": "бульвар",
+    "бул": "бульвар",
+    "наб": "набережная",
+    "ш": "шоссе",
+    "д": "дом",
+    "корп": "корпус",
+    "к": "корпус",
+    "стр": "строение",
+}
+
+TOKEN_RE = re.compile(r"\w+(?:-\w+)*")
+
+
+def normalize_address(address):
+    text = unicodedata.normalize("NFKC", address).casefold().replace("ё", "е")
+    tokens = TOKEN_RE.findall(text)
+    return " ".join(ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+def make_address_hash(address):
+    normalized = normalize_address(address)
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
@@ -0,0 +1,10 @@
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .api import get_backend
+
+
+@receiver(setting_changed)
+def reset_geocoder_backend(sender, setting, **kwargs):
+    if setting.startswith("GEOCODER_") or setting == "YANDEX_GEOCODER_API_KEY":
+        get_backend.cache_clear()
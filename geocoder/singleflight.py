@@ -0,0 +1,40 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Склеивает одновременные вызовы с одним ключом в один.
+
+    Первый вызов выполняет функцию, остальные ждут и получают его результат
+    или его исключение.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+
+        if not leader:
+            return call.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,39 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .backends import build_response
+
+
+class StubGeocoderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        address = query.get("geocode", [""])[0]
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+        body = json.dumps(build_response(server.geocoder.geocode(address))).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_stub_server(geocoder, host="127.0.0.1", port=8001, latency=0, jitter=0):
+    server = ThreadingHTTPServer((host, port), StubGeocoderHandler)
+    server.daemon_threads = True
+    server.geocoder = geocoder
+    server.latency = latency
+    server.jitter = jitter
+    return server
@@ -0,0 +1,55 @@
+from django.db.models import Q
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from foodcartapp.models import Order
+
+FEED_LIMIT = 200
+
+
+def encode_feed_cursor(change_seq, pk):
+    return urlsafe_base64_encode(f"{change_seq}|{pk}".encode())
+
+
+def decode_feed_cursor(cursor):
+    try:
+        change_seq, pk = force_str(urlsafe_base64_decode(cursor)).split("|")
+        return int(change_seq), int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_feed_cursor():
+    """Курсор, с которого дашборд начинает следить за изменениями."""
+    last = (
+        Order.objects.order_by("-change_seq", "-id")
+        .values_list("change_seq", "id")
+        .first()
+    )
+    return encode_feed_cursor(*(last or (0, 0)))
+
+
+def get_order_changes(orders, cursor, limit=FEED_LIMIT):
+    """Заказы, изменённые после курсора по (change_seq, id), и новый курсор.
+
+    change_seq раздаётся после фиксации транзакций под блокировкой счётчика
+    (см. foodcartapp.changes), так что номера становятся видны по порядку
+    и долгая транзакция не может оказаться позади курсора.
+
+    orders — queryset с нужными аннотациями и prefetch, к нему добавляются
+    только условия по курсору. Если курсор не разобрать, отдаётся пустой
+    список и курсор текущего момента.
+    """
+    position = decode_feed_cursor(cursor) if cursor else None
+    if position is None:
+        return [], get_feed_cursor()
+
+    change_seq, order_id = position
+    changed = list(
+        orders.filter(
+            Q(change_seq__gt=change_seq) | Q(change_seq=change_seq, id__gt=order_id)
+        ).order_by("change_seq", "id")[:limit]
+    )
+    if not changed:
+        return [], cursor
+    return changed, encode_feed_cursor(changed[-1].change_seq, changed[-1].id)
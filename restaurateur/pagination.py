@@ -0,0 +1,42 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+def encode_cursor(order):
+    value = f"{order.created_at.isoformat()}|{order.id}"
+    return urlsafe_base64_encode(value.encode())
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, order_id = force_str(urlsafe_base64_decode(cursor)).split("|")
+        created_at = parse_datetime(created_at)
+        order_id = int(order_id)
+    except (TypeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, order_id
+
+
+def paginate_by_keyset(orders, cursor=None, page_size=50):
+    """Отдаёт страницу заказов после курсора по (created_at, id), от новых к старым.
+
+    В отличие от OFFSET, условие по курсору читает индекс сразу с нужного
+    места, поэтому время страницы не зависит от её номера. Возвращает
+    заказы страницы и курсор следующей страницы или None.
+    """
+    orders = orders.order_by("-created_at", "-id")
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, order_id = position
+        orders = orders.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id)
+        )
+    page = list(orders[: page_size + 1])
+    if len(page) > page_size:
+        page = page[:page_size]
+        return page, encode_cursor(page[-1])
+    return page, None
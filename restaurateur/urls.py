@@ -10,6 +10,7 @@ urlpatterns = [
     path("products/", views.view_products, name="ProductsView"),
     path("restaurants/", views.view_restaurants, name="RestaurantView"),
     path("orders/", views.view_orders, name="view_orders"),
+    path("orders/feed/", views.orders_feed, name="orders_feed"),
     path("login/", views.LoginView.as_view(), name="login"),
     path("logout/", views.LogoutView.as_view(), name="logout"),
 ]
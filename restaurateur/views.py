@@ -2,32 +2,33 @@ from django import forms
 from django.shortcuts import redirect, render
 
 from django.views import View
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth import authenticate, login
 
 from django.contrib.auth import views as auth_views
 from django.http import JsonResponse
+from django.template.loader import render_to_string
 
-from foodcartapp.models import Product, Restaurant, Order, OrderItem
-from django.db.models import Sum, F
+from foodcartapp.models import (
+    Product,
+    Restaurant,
+    Order,
+    OrderItem,
+    OrderRestaurantCandidate,
+)
+from foodcartapp.menu_index import menu_index
+from restaurateur.feed import FEED_LIMIT, get_feed_cursor, get_order_changes
+from restaurateur.pagination import paginate_by_keyset
+from django.db.models import Prefetch
 
 from django.shortcuts import get_object_or_404
-from django.db.models.signals import post_save, post_delete
 
-from django.dispatch import receiver
 from django.db import transaction, IntegrityError, DatabaseError
 
-
-@receiver([post_save, post_delete], sender=OrderItem)
-def update_order_total(sender, instance, **kwargs):
-    order = instance.order
-    total = (
-        order.items.aggregate(total=Sum(F("quantity") * F("fixed_price")))["total"] or 0
-    )
-    order.total_price = total
-    order.save()
+ORDERS_PAGE_SIZE = 50
+ORDERS_FEED_INTERVAL = 5
 
 
 class Login(forms.Form):
@@ -79,16 +80,17 @@ def is_manager(user):
 @user_passes_test(is_manager, login_url="restaurateur:login")
 def view_products(request):
     restaurants = list(Restaurant.objects.order_by("name"))
-    products = list(Product.objects.prefetch_related("menu_items"))
+    products = list(Product.objects.all())
+    menu = menu_index.snapshot()
     products_with_restaurant_availability = [
         (
             product,
-            [availability.get(restaurant.id, False) for restaurant in restaurants],
+            [
+                menu.is_available(product.id, restaurant.id)
+                for restaurant in restaurants
+            ],
         )
         for product in products
-        for availability in [
-            {item.restaurant_id: item.availability for item in product.menu_items.all()}
-        ]
     ]
     return render(
         request,
@@ -111,17 +113,124 @@ def view_restaurants(request):
     )
 
 
+def get_order_filters(request):
+    return {
+        "status": request.GET.get("status", ""),
+        "payment_method": request.GET.get("payment_method", ""),
+        "restaurant": request.GET.get("restaurant", ""),
+    }
+
+
+def filter_orders(orders, filters):
+    orders = orders.open()
+    if filters["status"] in dict(Order.STATUS_CHOICES):
+        orders = orders.filter(status=filters["status"])
+    if filters["payment_method"] in dict(Order.PAYMENT_METHOD_CHOICES):
+        orders = orders.filter(payment_method=filters["payment_method"])
+    if filters["restaurant"] == "none":
+        orders = orders.filter(restaurant__isnull=True)
+    elif filters["restaurant"].isdigit():
+        orders = orders.filter(restaurant_id=filters["restaurant"])
+    return orders
+
+
+def with_dashboard_data(orders):
+    return orders.with_address_status().prefetch_related(
+        "restaurant",
+        Prefetch(
+            "candidates",
+            queryset=OrderRestaurantCandidate.objects.select_related("restaurant"),
+        ),
+    )
+
+
 @user_passes_test(is_manager, login_url="restaurateur:login")
 def view_orders(request):
-    orders = Order.objects.exclude(status="completed").prefetch_related(
-        "items__product", "restaurant"
+    filters = get_order_filters(request)
+    # Курсор читается до страницы: заказ, опубликованный между ними, придёт
+    # в ленте, а повтор уже показанного заказа клиент просто заменит по id
+    feed_cursor = get_feed_cursor()
+    orders, next_cursor = paginate_by_keyset(
+        with_dashboard_data(filter_orders(Order.objects.all(), filters)),
+        request.GET.get("after"),
+        ORDERS_PAGE_SIZE,
+    )
+
+    next_query = None
+    if next_cursor:
+        query = request.GET.copy()
+        query["after"] = next_cursor
+        next_query = query.urlencode()
+    filters_query = request.GET.copy()
+    filters_query.pop("after", None)
+
+    return render(
+        request,
+        "manager_orders.html",
+        {
+            "orders": orders,
+            "filters": filters,
+            "status_choices": [
+                choice for choice in Order.STATUS_CHOICES if choice[0] != "completed"
+            ],
+            "payment_choices": Order.PAYMENT_METHOD_CHOICES,
+            "restaurants": Restaurant.objects.order_by("name"),
+            "next_query": next_query,
+            "first_query": filters_query.urlencode(),
+            "is_first_page": "after" not in request.GET,
+            "feed_cursor": feed_cursor,
+            "feed_interval": ORDERS_FEED_INTERVAL * 1000,
+            "feed_limit": FEED_LIMIT,
+            "return_url": request.get_full_path(),
+        },
+    )
+
+
+def collect_order_changes(request, cursor):
+    """Изменённые после курсора заказы в виде готовых строк таблицы.
+
+    Заказ, который перестал подходить под фильтры дашборда, например
+    завершённый, отдаётся с visible=False, чтобы клиент убрал его строку.
+    """
+    filters = get_order_filters(request)
+    changed, cursor = get_order_changes(
+        with_dashboard_data(Order.objects.all()), cursor
     )
+    visible_ids = set(
+        filter_orders(
+            Order.objects.filter(pk__in=[order.id for order in changed]), filters
+        ).values_list("id", flat=True)
+    )
+    # Строки ведут обратно на дашборд с теми же фильтрами, что и у страницы
+    query = request.GET.copy()
+    query.pop("since", None)
+    return_url = reverse("restaurateur:view_orders")
+    if query:
+        return_url = f"{return_url}?{query.urlencode()}"
+    return {
+        "cursor": cursor,
+        "orders": [
+            {
+                "id": order.id,
+                "visible": order.id in visible_ids,
+                "html": (
+                    render_to_string(
+                        "order_row.html",
+                        {"order": order, "return_url": return_url},
+                        request=request,
+                    )
+                    if order.id in visible_ids
+                    else ""
+                ),
+            }
+            for order in changed
+        ],
+    }
 
-    for order in orders:
-        order.restaurant_distances = order.get_restaurants_with_distances()
 
-        order.total = order.total_price()
-    return render(request, "manager_orders.html", {"orders": orders})
+@user_passes_test(is_manager, login_url="restaurateur:login")
+def orders_feed(request):
+    return JsonResponse(collect_order_changes(request, request.GET.get("since")))
 
 
 def create_order_view(request):
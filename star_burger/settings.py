@@ -9,6 +9,21 @@ env.read_env()
 
 YANDEX_GEOCODER_API_KEY = env('YANDEX_GEOCODER_API_KEY')
 
+GEOCODER_BACKEND = env('GEOCODER_BACKEND', 'geocoder.backends.YandexGeocoder')
+GEOCODER_GAZETTEER = env('GEOCODER_GAZETTEER', '')
+GEOCODER_STUB_URL = env('GEOCODER_STUB_URL', 'http://127.0.0.1:8001/1.x/')
+GEOCODER_CACHE_SIZE = env.int('GEOCODER_CACHE_SIZE', 10000)
+GEOCODER_TIMEOUT = env.float('GEOCODER_TIMEOUT', 5)
+GEOCODER_POOL_SIZE = env.int('GEOCODER_POOL_SIZE', 10)
+GEOCODER_MAX_RETRIES = env.int('GEOCODER_MAX_RETRIES', 2)
+GEOCODER_BREAKER_THRESHOLD = env.int('GEOCODER_BREAKER_THRESHOLD', 5)
+GEOCODER_BREAKER_TIMEOUT = env.float('GEOCODER_BREAKER_TIMEOUT', 30)
+
+# geodesic, haversine или equirectangular, см. foodcartapp/distances.py
+DISTANCE_MODE = env('DISTANCE_MODE', 'equirectangular')
+# Дальше этого рестораны не предлагаются заказу и не назначаются на него
+RESTAURANT_SEARCH_RADIUS_KM = env.float('RESTAURANT_SEARCH_RADIUS_KM', 50)
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -103,6 +118,10 @@ DATABASES = {
     'default': dj_database_url.config(default=env('DATABASE_URL'))
 }
 
+CACHES = {
+    'default': env.dj_cache_url('CACHE_URL', 'locmem://')
+}
+
 
 
 AUTH_PASSWORD_VALIDATORS = [